@@ -13,13 +13,17 @@ Requirements:
 """
 
 import streamlit as st
-import joblib
 import os
 import sys
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from drift_monitor import FEATURE_LABELS, MIN_OBSERVATIONS
+from model_manager import DEFAULT_MODEL_KEY, ModelManager
+from latency_guard import MAX_RUN_CHARS, SEGMENT_CHARS, TIME_BUDGET_MS, score_guarded, segment_message
+from similarity import index_path_for, load_index
+
 
 # Page configuration
 st.set_page_config(
@@ -29,30 +33,80 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Named models served from this directory (see model_manager.py)
+MODEL_DIR = 'models'
+MODEL_MEMORY_BUDGET_MB = 256
+
 
 @st.cache_resource
-def load_model(model_path='spam_model.joblib'):
+def load_model_manager(model_dir=MODEL_DIR, memory_budget_mb=MODEL_MEMORY_BUDGET_MB):
     """
-    Load the pre-trained spam classifier model.
-    Uses Streamlit's cache to avoid reloading on every interaction.
+    Create the model manager shared by all sessions.
+    Uses Streamlit's cache so every session routes through the same LRU.
+    
+    Args:
+        model_dir (str): Directory holding named '<key>.joblib' models
+        memory_budget_mb (float): Memory budget for resident models
+        
+    Returns:
+        ModelManager: Manager serving models by key
+    """
+    return ModelManager(model_dir, memory_budget_mb=memory_budget_mb)
+
+
+def load_model(model_key=DEFAULT_MODEL_KEY):
+    """
+    Load a spam classifier model by key.
+    Models are loaded on first use and kept in the manager's LRU, so
+    switching between hot models does not reload them.
     
     Args:
-        model_path (str): Path to the saved model file
+        model_key (str): Model key; 'default' serves spam_model.joblib
         
     Returns:
         model: Loaded scikit-learn pipeline
         
     Raises:
-        FileNotFoundError: If model file doesn't exist
+        FileNotFoundError: If no model exists for the key
+    """
+    try:
+        return load_model_manager().get(model_key)
+    except KeyError as e:
+        raise FileNotFoundError(str(e.args[0]))
+
+
+@st.cache_resource
+def load_similarity_index(index_path, version):
     """
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model file '{model_path}' not found")
+    Load the similar-message index saved next to a model by train.py.
+    Uses Streamlit's cache so the TF-IDF matrix is loaded once per file version.
     
+    Args:
+        index_path (str): Index file, see similarity.index_path_for
+        version (int): File modification time; a retrained index gets a new
+            version and is loaded again
+        
+    Returns:
+        SimilarityIndex: Index of the model's training messages, or None if missing
+    """
+    return load_index(index_path)
+
+
+def similarity_index_for(model_key=DEFAULT_MODEL_KEY):
+    """
+    Current similar-message index of a model.
+    
+    Args:
+        model_key (str): Model key
+        
+    Returns:
+        SimilarityIndex: Index of the model's training messages, or None if missing
+    """
     try:
-        model = joblib.load(model_path)
-        return model
-    except Exception as e:
-        raise RuntimeError(f"Failed to load model: {e}")
+        index_path = index_path_for(load_model_manager().model_path(model_key))
+        return load_similarity_index(index_path, os.stat(index_path).st_mtime_ns)
+    except (KeyError, OSError):
+        return None
 
 
 @st.cache_data
@@ -233,43 +287,100 @@ def display_dataset_overview(df):
         st.write(f"- Max length: {spam_stats['max']:.0f} characters")
 
 
-def predict_message(model, message):
+def predict_message(model, message, monitor=None):
     """
     Predict whether a message is spam or ham.
+    Text normalization is a step of the loaded pipeline, so the message is
+    canonicalized exactly as the training data was. Scoring cost is bounded
+    (see latency_guard.py): very long inputs are scored on sampled windows
+    within a time budget, and the report says how much of the text was used.
     
     Args:
         model: Trained classifier pipeline
         message (str): SMS message text to classify
+        monitor: Optional DriftMonitor that records this prediction
         
     Returns:
-        tuple: (prediction, confidence_spam, confidence_ham)
+        tuple: (prediction, confidence_spam, confidence_ham, report)
             - prediction (str): 'spam' or 'ham'
             - confidence_spam (float): Probability of being spam (0-100)
             - confidence_ham (float): Probability of being ham (0-100)
+            - report (dict): Scoring report from latency_guard.score_guarded
     """
     try:
-        # Make prediction
-        prediction = model.predict([message])[0]
-        
-        # Get probability scores
-        probabilities = model.predict_proba([message])[0]
+        report = score_guarded(model, message, monitor=monitor)
+        prediction = report['label']
         
-        # Extract probabilities for ham and spam
-        # Note: classes are typically ordered alphabetically: ['ham', 'spam']
-        classes = model.classes_
-        prob_dict = dict(zip(classes, probabilities))
+        confidence_spam = report['spam_probability'] * 100
+        confidence_ham = 100 - confidence_spam
         
-        confidence_ham = prob_dict.get('ham', 0) * 100
-        confidence_spam = prob_dict.get('spam', 0) * 100
-        
-        return prediction, confidence_spam, confidence_ham
+        return prediction, confidence_spam, confidence_ham, report
         
     except Exception as e:
         st.error(f"Prediction error: {e}")
-        return None, 0, 0
+        return None, 0, 0, None
+
+
+def display_truncation_notice(report):
+    """
+    Explain which part of a long input was scored.
+    
+    Args:
+        report (dict): Scoring report from latency_guard.score_guarded
+    """
+    if report['segments_total'] > 1:
+        st.info(
+            f"✂️ **Long input:** scored {report['segments_scored']} of {report['segments_total']} "
+            f"windows of about {SEGMENT_CHARS:,} characters "
+            f"({report['chars_scored']:,} of {report['chars_total']:,} characters), "
+            f"combining the evidence of each window."
+        )
+    else:
+        st.info(f"✂️ **Long words shortened:** words over {MAX_RUN_CHARS} characters were cut before scoring.")
+    if report['budget_exceeded']:
+        st.caption(f"⏱️ Scoring stopped at the {TIME_BUDGET_MS} ms time budget.")
+
+
+def display_drift_status(monitor):
+    """
+    Display the live drift monitor status in the sidebar.
+    
+    Args:
+        monitor (DriftMonitor): Monitor of the selected model
+    """
+    st.sidebar.markdown("### 📉 Drift Monitor")
+    report = monitor.report()
+    
+    if report['status'] == 'no reference':
+        st.sidebar.caption("No reference profile for this model. Run `python train.py` to create one.")
+        return
+    if report['score'] is None:
+        st.sidebar.caption(
+            f"Collecting live traffic: {report['observations']}/{MIN_OBSERVATIONS} messages"
+        )
+        return
+    
+    icons = {'stable': '✅', 'moderate': '⚠️', 'significant': '🚨'}
+    st.sidebar.metric(
+        label="Drift score (PSI)",
+        value=f"{report['score']:.3f}",
+        delta=f"{icons[report['status']]} {report['status']}",
+        delta_color="off"
+    )
+    st.sidebar.caption(f"Based on the last {report['observations']:,} scored messages")
+    for name, value in report['psi'].items():
+        st.sidebar.write(f"- {FEATURE_LABELS[name]}: {value:.3f}")
+    
+    windows = pd.DataFrame(
+        monitor.spam_ratio_by_window(), columns=['window', 'spam_ratio', 'messages']
+    )
+    if len(windows) > 1:
+        windows['window'] = pd.to_datetime(windows['window'], unit='s')
+        st.sidebar.caption("Predicted spam ratio per window")
+        st.sidebar.line_chart(windows.set_index('window')['spam_ratio'], height=150)
 
 
-def display_prediction_result(prediction, confidence_spam, confidence_ham):
+def display_prediction_result(prediction, confidence_spam, confidence_ham, neighbors=None):
     """
     Display prediction results with visual feedback.
     
@@ -277,6 +388,8 @@ def display_prediction_result(prediction, confidence_spam, confidence_ham):
         prediction (str): 'spam' or 'ham'
         confidence_spam (float): Spam confidence percentage
         confidence_ham (float): Ham confidence percentage
+        neighbors (list): Optional most similar training messages, as
+            returned by SimilarityIndex.query
     """
     st.markdown("---")
     st.subheader("📊 Prediction Result")
@@ -329,6 +442,28 @@ def display_prediction_result(prediction, confidence_spam, confidence_ham):
     st.markdown("#### Probability Distribution")
     st.progress(confidence_ham / 100, text=f"Ham: {confidence_ham:.1f}%")
     st.progress(confidence_spam / 100, text=f"Spam: {confidence_spam:.1f}%")
+    
+    # Closest labeled training examples
+    if neighbors is not None:
+        st.markdown("### 🔎 Similar Training Messages")
+        if len(neighbors) == 0:
+            st.caption("No training message shares a word with this message.")
+        else:
+            neighbors_df = pd.DataFrame(neighbors)
+            neighbors_df['label'] = neighbors_df['label'].map({'spam': '🔴 spam', 'ham': '🟢 ham'})
+            st.dataframe(
+                neighbors_df[['similarity', 'label', 'text']],
+                column_config={
+                    'similarity': st.column_config.ProgressColumn(
+                        "Similarity", format="%.2f", min_value=0.0, max_value=1.0
+                    ),
+                    'label': st.column_config.TextColumn("Label", width="small"),
+                    'text': st.column_config.TextColumn("Message", width="large"),
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
+            st.caption("Cosine similarity of TF-IDF vectors, computed on the normalized text.")
 
 
 def main():
@@ -346,9 +481,21 @@ def main():
         """
     )
     
+    # Pick a model when several are available (e.g. per carrier/region)
+    model_keys = load_model_manager().available_models()
+    if len(model_keys) > 1:
+        model_key = st.selectbox(
+            "Model",
+            options=model_keys,
+            index=model_keys.index(DEFAULT_MODEL_KEY) if DEFAULT_MODEL_KEY in model_keys else 0,
+            help=f"Named models from the '{MODEL_DIR}' directory",
+        )
+    else:
+        model_key = DEFAULT_MODEL_KEY
+    
     # Try to load the model
     try:
-        model = load_model('spam_model.joblib')
+        model = load_model(model_key)
         model_loaded = True
     except FileNotFoundError:
         model_loaded = False
@@ -414,8 +561,11 @@ def main():
     
     # Character count
     char_count = len(user_message)
-    if char_count > 1000:
-        st.warning(f"⚠️ Message is {char_count} characters long. Very long messages may affect prediction accuracy.")
+    if char_count > SEGMENT_CHARS:
+        st.caption(
+            f"Character count: {char_count:,} - longer than {SEGMENT_CHARS:,} characters, "
+            f"so sampled windows of the message will be scored"
+        )
     else:
         st.caption(f"Character count: {char_count}")
     
@@ -430,11 +580,27 @@ def main():
         else:
             # Show processing spinner
             with st.spinner("🤖 Analyzing message..."):
-                prediction, confidence_spam, confidence_ham = predict_message(model, user_message)
+                prediction, confidence_spam, confidence_ham, report = predict_message(
+                    model, user_message, monitor=load_model_manager().drift_monitor(model_key)
+                )
             
             if prediction:
+                if report['truncated']:
+                    display_truncation_notice(report)
+                
+                # Look up the closest labeled training messages
+                similarity_index = similarity_index_for(model_key)
+                neighbors = None
+                if similarity_index is not None:
+                    try:
+                        # Query with the first bounded window, never the raw input
+                        first_window = segment_message(user_message)[0][0]
+                        neighbors = similarity_index.query(model, first_window)
+                    except ValueError as e:
+                        st.warning(f"⚠️ Similar messages unavailable: {e}")
+                
                 # Display results
-                display_prediction_result(prediction, confidence_spam, confidence_ham)
+                display_prediction_result(prediction, confidence_spam, confidence_ham, neighbors)
     
     # Dataset Overview Section
     st.markdown("---")
@@ -462,6 +628,14 @@ def main():
         - **Accuracy**: ~96%
         - **Training Data**: 5,500+ SMS messages
         
+        ### Error Analysis
+        Open the **Misclassification Explorer** page to browse the
+        messages the model gets wrong.
+        
+        ### Retraining
+        Open the **Retrain Model** page to retrain in the background.
+        The current model keeps serving until the new one is validated.
+        
         ### What is Spam?
         Spam messages are unsolicited, often commercial or malicious messages that you didn't ask for.
         
@@ -475,6 +649,22 @@ def main():
         """
     )
     
+    # Live drift monitoring for the selected model
+    monitor = load_model_manager().drift_monitor(model_key)
+    if monitor is not None:
+        st.sidebar.markdown("---")
+        display_drift_status(monitor)
+    
+    # Model cache statistics
+    model_stats = load_model_manager().stats()
+    if len(model_stats) > 0:
+        with st.sidebar.expander("🗂️ Model Cache"):
+            st.dataframe(
+                model_stats[['model', 'resident', 'hits', 'loads', 'evictions', 'size_mb']],
+                hide_index=True,
+                use_container_width=True,
+            )
+    
     st.sidebar.markdown("---")
     st.sidebar.caption("Built with Streamlit & scikit-learn")
     
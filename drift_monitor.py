@@ -0,0 +1,423 @@
+"""
+SMS Spam Classifier - Streaming Drift Monitor
+
+Tracks whether live traffic drifts away from the data the model was trained
+on, without storing individual predictions. Every scored batch updates
+fixed-bin histograms of
+
+    - spam probability
+    - message length (characters)
+    - out-of-vocabulary (OOV) token rate
+
+plus spam/ham prediction counts. Histograms are kept per time window in a
+ring of the most recent windows, so memory is constant no matter how much
+traffic is observed, and old traffic ages out.
+
+train.py writes the same sketches for held-out training data as a reference
+profile next to the model ('spam_model.joblib' -> 'spam_model_drift.json').
+The live sketches are compared with the reference using the Population
+Stability Index (PSI); the drift score is the largest PSI over all features.
+Common reading: below 0.1 stable, 0.1-0.25 moderate shift, above 0.25
+significant drift.
+
+Usage:
+    python drift_monitor.py   # print reference profile and monitoring overhead
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+# Bin edges per feature; the last length bin is open-ended
+FEATURE_BINS = {
+    'spam_probability': np.linspace(0.0, 1.0, 21),
+    'length': np.array([0, 10, 20, 40, 60, 80, 100, 130, 160, 200, 300, 500, np.inf]),
+    'oov_rate': np.linspace(0.0, 1.0, 11),
+}
+
+FEATURE_LABELS = {
+    'spam_probability': 'Spam probability',
+    'length': 'Message length',
+    'oov_rate': 'OOV token rate',
+    'spam_ratio': 'Spam ratio',
+}
+
+DRIFT_MODERATE = 0.1
+DRIFT_SIGNIFICANT = 0.25
+
+# Messages whose OOV rate is measured per scored batch. Tokenizing is the only
+# per-message cost of monitoring, so large batches are sampled.
+OOV_SAMPLE_SIZE = 16
+
+# Minimum observations in the live window before a drift score is reported
+MIN_OBSERVATIONS = 50
+
+
+def reference_path_for(model_path):
+    """
+    Path of the reference profile that belongs to a model file.
+
+    Args:
+        model_path (str): e.g. 'spam_model.joblib' or 'models/uk.joblib'
+
+    Returns:
+        str: e.g. 'spam_model_drift.json' or 'models/uk_drift.json'
+    """
+    return os.path.splitext(model_path)[0] + '_drift.json'
+
+
+def population_stability_index(expected, actual, epsilon=1e-4):
+    """
+    PSI between two histograms over the same bins.
+
+    Args:
+        expected (numpy.ndarray): Reference bin counts
+        actual (numpy.ndarray): Live bin counts
+        epsilon (float): Floor for empty bins so the log stays finite
+
+    Returns:
+        float: PSI (0 means identical distributions)
+    """
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if expected.sum() == 0 or actual.sum() == 0:
+        return 0.0
+    p = np.maximum(expected / expected.sum(), epsilon)
+    q = np.maximum(actual / actual.sum(), epsilon)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def _bin_counts(values, edges):
+    # Searching the interior edges only sends out-of-range values to the
+    # first/last bin without a separate clip
+    indices = np.searchsorted(edges[1:-1], values, side='right')
+    return np.bincount(indices, minlength=len(edges) - 1)
+
+
+class OOVMeter:
+    """
+    Measures the share of a message's tokens missing from the model vocabulary.
+
+    Uses the pipeline's own preprocessing steps and TF-IDF analyzer, so
+    tokens are exactly the ones the model sees.
+
+    Args:
+        model: Trained pipeline with a 'tfidf' step
+    """
+
+    def __init__(self, model):
+        steps = [name for name, _ in model.steps]
+        self._preprocess = [step for _, step in model.steps[:steps.index('tfidf')]]
+        tfidf = model.named_steps['tfidf']
+        self._analyzer = tfidf.build_analyzer()
+        self._vocabulary = tfidf.vocabulary_
+
+    def rates(self, messages):
+        """
+        Args:
+            messages (list): Message strings
+
+        Returns:
+            numpy.ndarray: OOV rate (0-1) per message; 0 for messages with no tokens
+        """
+        for step in self._preprocess:
+            messages = step.transform(messages)
+        vocabulary = self._vocabulary
+        rates = np.zeros(len(messages))
+        for i, message in enumerate(messages):
+            tokens = self._analyzer(message)
+            if tokens:
+                rates[i] = sum(token not in vocabulary for token in tokens) / len(tokens)
+        return rates
+
+
+class DriftSketch:
+    """
+    Constant-size summary of a set of scored messages.
+
+    Holds one histogram per feature and the spam/ham prediction counts.
+    Sketches over the same bins can be added together.
+    """
+
+    def __init__(self):
+        self.histograms = {name: np.zeros(len(edges) - 1, dtype=np.int64)
+                           for name, edges in FEATURE_BINS.items()}
+        self.spam = 0
+        self.ham = 0
+
+    @property
+    def count(self):
+        return self.spam + self.ham
+
+    def update(self, spam_probabilities, lengths, oov_rates, labels):
+        """
+        Add a batch of observations.
+
+        Args:
+            spam_probabilities (numpy.ndarray): Spam probability per message
+            lengths (numpy.ndarray): Character length per message
+            oov_rates (numpy.ndarray): OOV rate per sampled message
+            labels (numpy.ndarray): Predicted label per message
+        """
+        self.histograms['spam_probability'] += _bin_counts(spam_probabilities, FEATURE_BINS['spam_probability'])
+        self.histograms['length'] += _bin_counts(lengths, FEATURE_BINS['length'])
+        if len(oov_rates):
+            self.histograms['oov_rate'] += _bin_counts(oov_rates, FEATURE_BINS['oov_rate'])
+        n_spam = int(np.sum(np.asarray(labels) == 'spam'))
+        self.spam += n_spam
+        self.ham += len(labels) - n_spam
+
+    def add(self, other):
+        for name in self.histograms:
+            self.histograms[name] += other.histograms[name]
+        self.spam += other.spam
+        self.ham += other.ham
+        return self
+
+    @property
+    def spam_ratio(self):
+        return self.spam / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            'histograms': {name: counts.tolist() for name, counts in self.histograms.items()},
+            'spam': self.spam,
+            'ham': self.ham,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        for name, counts in data['histograms'].items():
+            if name in sketch.histograms and len(counts) == len(sketch.histograms[name]):
+                sketch.histograms[name] = np.array(counts, dtype=np.int64)
+        sketch.spam = data['spam']
+        sketch.ham = data['ham']
+        return sketch
+
+
+def batch_features(messages, oov_meter, sample_size=OOV_SAMPLE_SIZE, rng=None):
+    """
+    Compute the per-message features of one scored batch.
+
+    OOV rates are measured on at most sample_size messages of the batch.
+
+    Returns:
+        tuple: (lengths, oov_rates) as numpy arrays
+    """
+    lengths = np.fromiter((len(message) for message in messages), dtype=float, count=len(messages))
+    if len(messages) > sample_size:
+        rng = rng or np.random.default_rng()
+        sample = rng.choice(len(messages), size=sample_size, replace=False)
+        oov_rates = oov_meter.rates([messages[i] for i in sample])
+    else:
+        oov_rates = oov_meter.rates(messages)
+    return lengths, oov_rates
+
+
+def build_reference(model, messages, path=None):
+    """
+    Score messages and summarize them as a reference sketch.
+
+    Args:
+        model: Trained pipeline
+        messages: Messages representative of expected traffic
+        path (str): Optional path to write the reference profile as JSON
+
+    Returns:
+        DriftSketch: Reference sketch (OOV measured on every message)
+    """
+    from scoring import score_messages
+
+    messages = list(messages)
+    labels, spam_probabilities = score_messages(model, messages)
+    lengths, oov_rates = batch_features(messages, OOVMeter(model), sample_size=len(messages))
+    sketch = DriftSketch()
+    sketch.update(spam_probabilities, lengths, oov_rates, labels)
+
+    if path:
+        with open(path, 'w') as f:
+            json.dump({'created': time.time(), 'reference': sketch.to_dict()}, f)
+    return sketch
+
+
+def load_reference(path):
+    """
+    Load a reference profile written by build_reference.
+
+    Returns:
+        DriftSketch: Reference sketch, or None if the file doesn't exist
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return DriftSketch.from_dict(json.load(f)['reference'])
+
+
+class DriftMonitor:
+    """
+    Windowed live sketches compared against a reference profile.
+
+    Keeps one DriftSketch per time window for the last max_windows windows.
+    Memory is bounded by max_windows times the (fixed) sketch size. Windows
+    older than max_windows * window_seconds are dropped even when no new
+    traffic arrives, so after a quiet period the live view is empty instead
+    of showing stale traffic.
+
+    Args:
+        model: Trained pipeline being monitored (used for OOV measurement)
+        reference (DriftSketch): Reference sketch, or None to only collect
+        window_seconds (float): Length of one time window
+        max_windows (int): Number of recent windows compared with the reference
+        clock (callable): Returns the current time in seconds (for tests)
+    """
+
+    def __init__(self, model, reference=None, window_seconds=300, max_windows=12, clock=time.time):
+        self.reference = reference
+        self.window_seconds = window_seconds
+        self.max_windows = max_windows
+        self._clock = clock
+        self._oov_meter = OOVMeter(model)
+        self._windows = deque(maxlen=max_windows)   # (window start, DriftSketch)
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng()
+
+    def _expire(self, now):
+        # Caller holds the lock
+        cutoff = now - self.max_windows * self.window_seconds
+        while self._windows and self._windows[0][0] <= cutoff:
+            self._windows.popleft()
+
+    def _current_window(self, now):
+        self._expire(now)
+        start = now - now % self.window_seconds
+        if not self._windows or self._windows[-1][0] != start:
+            self._windows.append((start, DriftSketch()))
+        return self._windows[-1][1]
+
+    def observe(self, messages, labels, spam_probabilities):
+        """
+        Record one scored batch.
+
+        Args:
+            messages: Message strings that were scored
+            labels: Predicted labels
+            spam_probabilities: Spam probabilities (0-1)
+        """
+        messages = list(messages)
+        lengths, oov_rates = batch_features(messages, self._oov_meter, rng=self._rng)
+        with self._lock:
+            self._current_window(self._clock()).update(
+                np.asarray(spam_probabilities, dtype=float), lengths, oov_rates, labels
+            )
+
+    def live_sketch(self):
+        """
+        Returns:
+            DriftSketch: Sum of the retained windows
+        """
+        with self._lock:
+            self._expire(self._clock())
+            total = DriftSketch()
+            for _, sketch in self._windows:
+                total.add(sketch)
+        return total
+
+    def spam_ratio_by_window(self):
+        """
+        Returns:
+            list: (window start timestamp, spam ratio, messages) per retained window
+        """
+        with self._lock:
+            self._expire(self._clock())
+            return [(start, sketch.spam_ratio, sketch.count) for start, sketch in self._windows]
+
+    def report(self):
+        """
+        Compare the live window with the reference.
+
+        Returns:
+            dict: 'observations', 'score' (None until enough data or without a
+            reference), 'status', and per-feature 'psi'
+        """
+        live = self.live_sketch()
+        report = {'observations': live.count, 'score': None, 'status': 'collecting', 'psi': {}}
+        if self.reference is None:
+            report['status'] = 'no reference'
+            return report
+        if live.count < MIN_OBSERVATIONS:
+            return report
+
+        psi = {
+            name: population_stability_index(self.reference.histograms[name], live.histograms[name])
+            for name in FEATURE_BINS
+        }
+        psi['spam_ratio'] = population_stability_index(
+            [self.reference.ham, self.reference.spam], [live.ham, live.spam]
+        )
+        score = max(psi.values())
+        report.update(psi=psi, score=score, status=drift_status(score))
+        return report
+
+
+def drift_status(score):
+    """
+    Map a drift score to 'stable', 'moderate' or 'significant'.
+    """
+    if score >= DRIFT_SIGNIFICANT:
+        return 'significant'
+    if score >= DRIFT_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+def benchmark(model_path='spam_model.joblib', file_path='sms_spam_no_header.csv', repeats=200):
+    """
+    Print the reference profile and the cost of monitoring per scoring call.
+    """
+    import joblib
+    import pandas as pd
+
+    from scoring import score_messages
+
+    model = joblib.load(model_path)
+    reference = load_reference(reference_path_for(model_path))
+    messages = pd.read_csv(file_path, header=None, names=['label', 'text'])['text'].tolist()
+    monitor = DriftMonitor(model, reference)
+
+    def median_ms(func, batch):
+        timings = []
+        for i in range(repeats):
+            chunk = messages[(i * batch) % len(messages):][:batch]
+            scored = score_messages(model, chunk)
+            start = time.perf_counter()
+            func(chunk, scored)
+            timings.append(time.perf_counter() - start)
+        return float(np.median(timings)) * 1000
+
+    print("=" * 64)
+    print("DRIFT MONITOR")
+    print("=" * 64)
+    if reference is None:
+        print("No reference profile found - run 'python train.py' first.")
+    else:
+        print(f"Reference: {reference.count} messages, spam ratio {reference.spam_ratio:.3f}")
+    print()
+    print(f"{'Batch size':<12}{'Score ms':>12}{'Monitor ms':>12}{'Overhead':>12}")
+    print("-" * 64)
+    for batch in [1, 128, 1024]:
+        score_ms = median_ms(lambda chunk, scored: score_messages(model, chunk), batch)
+        monitor_ms = median_ms(lambda chunk, scored: monitor.observe(chunk, *scored), batch)
+        print(f"{batch:<12}{score_ms:>12.3f}{monitor_ms:>12.3f}{monitor_ms / score_ms * 100:>11.1f}%")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    benchmark()
+    sys.exit(0)
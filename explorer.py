@@ -0,0 +1,231 @@
+"""
+SMS Spam Classifier - Prediction Store for Error Analysis
+
+Scores the full dataset once with vectorized batch calls and persists one row
+per message (label, prediction, spam probability, confidence, outcome) in an
+indexed SQLite file. The misclassification explorer page queries it with
+filters and LIMIT/OFFSET, so only the rows of the current page ever leave the
+database.
+
+Outcomes:
+    - true_positive: spam predicted as spam
+    - true_negative: ham predicted as ham
+    - false_positive: ham predicted as spam
+    - false_negative: spam predicted as ham
+"""
+
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from scoring import score_messages
+
+
+PREDICTIONS_PATH = 'predictions.db'
+
+OUTCOMES = ['false_positive', 'false_negative', 'true_positive', 'true_negative']
+
+OUTCOME_LABELS = {
+    'false_positive': 'False positive (ham flagged as spam)',
+    'false_negative': 'False negative (spam missed)',
+    'true_positive': 'True positive (spam caught)',
+    'true_negative': 'True negative (ham passed)',
+}
+
+# Messages scored per vectorized call while building the store
+SCORING_CHUNK_SIZE = 50_000
+
+
+def classify_outcomes(labels, predictions):
+    """
+    Map (actual, predicted) pairs to outcome names, vectorized.
+
+    Args:
+        labels (numpy.ndarray): Actual labels ('spam'/'ham')
+        predictions (numpy.ndarray): Predicted labels ('spam'/'ham')
+
+    Returns:
+        numpy.ndarray: Outcome name per message
+    """
+    actual_spam = labels == 'spam'
+    predicted_spam = predictions == 'spam'
+    return np.select(
+        [actual_spam & predicted_spam, ~actual_spam & ~predicted_spam, ~actual_spam & predicted_spam],
+        ['true_positive', 'true_negative', 'false_positive'],
+        default='false_negative',
+    )
+
+
+def build_predictions_db(model, df, db_path=PREDICTIONS_PATH, test_index=None):
+    """
+    Score every message and write the indexed prediction store.
+
+    Args:
+        model: Trained classifier pipeline
+        df (pandas.DataFrame): Dataset with 'label' and 'text' columns
+        db_path (str): Path of the SQLite file to (re)create
+        test_index: Optional index of rows held out for testing; those rows
+            get split='test', all others split='train'
+
+    Returns:
+        dict: Number of messages per outcome
+    """
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    if test_index is None:
+        split = np.full(len(df), 'all', dtype=object)
+    else:
+        split = np.where(df.index.isin(test_index), 'test', 'train')
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        for start in range(0, len(df), SCORING_CHUNK_SIZE):
+            chunk = df.iloc[start:start + SCORING_CHUNK_SIZE]
+            predictions, spam_probabilities = score_messages(model, chunk['text'].fillna(''))
+            labels = chunk['label'].to_numpy()
+            pd.DataFrame({
+                'id': chunk.index.to_numpy(),
+                'split': split[start:start + SCORING_CHUNK_SIZE],
+                'label': labels,
+                'predicted': predictions,
+                'spam_probability': spam_probabilities,
+                'confidence': np.maximum(spam_probabilities, 1 - spam_probabilities),
+                'outcome': classify_outcomes(labels, predictions),
+                'text': chunk['text'].to_numpy(),
+            }).to_sql('predictions', connection, if_exists='append', index=False)
+
+        # Selective filters (a few outcomes) use the outcome-first indexes;
+        # broad ones walk the confidence-first index in sort order and stop
+        # after one page. ANALYZE gives the planner the statistics to choose.
+        # Duplicate messages share a confidence, so id breaks ties and keeps
+        # OFFSET pages stable; it is the last key of every index.
+        connection.executescript(
+            """
+            CREATE INDEX idx_outcome_confidence ON predictions (outcome, confidence, id);
+            CREATE INDEX idx_split_outcome_confidence ON predictions (split, outcome, confidence, id);
+            CREATE INDEX idx_confidence ON predictions (confidence, id, outcome, split);
+            ANALYZE;
+            """
+        )
+        counts = dict(connection.execute(
+            "SELECT outcome, COUNT(*) FROM predictions GROUP BY outcome"
+        ).fetchall())
+        connection.commit()
+    finally:
+        connection.close()
+
+    # Swap in atomically so readers never see a half-written store
+    os.replace(tmp_path, db_path)
+    return counts
+
+
+def _connect_readonly(db_path):
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def _where_clause(outcomes, min_confidence, max_confidence, split):
+    outcomes = list(outcomes) or OUTCOMES
+    clauses = [
+        f"outcome IN ({', '.join('?' * len(outcomes))})",
+        "confidence BETWEEN ? AND ?",
+    ]
+    params = outcomes + [min_confidence, max_confidence]
+    if split and split != 'all':
+        clauses.insert(0, "split = ?")
+        params.insert(0, split)
+    return " AND ".join(clauses), params
+
+
+def count_outcomes(db_path=PREDICTIONS_PATH, split='all'):
+    """
+    Count stored messages per outcome.
+
+    Args:
+        db_path (str): Path of the prediction store
+        split (str): 'train', 'test' or 'all'
+
+    Returns:
+        dict: Outcome name -> number of messages
+    """
+    query = "SELECT outcome, COUNT(*) FROM predictions"
+    params = []
+    if split and split != 'all':
+        query += " WHERE split = ?"
+        params.append(split)
+    query += " GROUP BY outcome"
+
+    connection = _connect_readonly(db_path)
+    try:
+        counts = dict(connection.execute(query, params).fetchall())
+    finally:
+        connection.close()
+    return {outcome: counts.get(outcome, 0) for outcome in OUTCOMES}
+
+
+def count_predictions(db_path=PREDICTIONS_PATH, outcomes=('false_positive', 'false_negative'),
+                      min_confidence=0.5, max_confidence=1.0, split='all'):
+    """
+    Count stored predictions matching the filters.
+
+    Args:
+        db_path (str): Path of the prediction store
+        outcomes: Outcome names to include (empty means all)
+        min_confidence (float): Lower bound on confidence (0.5-1)
+        max_confidence (float): Upper bound on confidence (0.5-1)
+        split (str): 'train', 'test' or 'all'
+
+    Returns:
+        int: Number of matching rows
+    """
+    where, params = _where_clause(outcomes, min_confidence, max_confidence, split)
+    connection = _connect_readonly(db_path)
+    try:
+        return connection.execute(
+            f"SELECT COUNT(*) FROM predictions WHERE {where}", params
+        ).fetchone()[0]
+    finally:
+        connection.close()
+
+
+def query_predictions(db_path=PREDICTIONS_PATH, outcomes=('false_positive', 'false_negative'),
+                      min_confidence=0.5, max_confidence=1.0, split='all',
+                      page=1, page_size=50, most_confident_first=True):
+    """
+    Fetch one page of stored predictions matching the filters.
+
+    Args:
+        db_path (str): Path of the prediction store
+        outcomes: Outcome names to include (empty means all)
+        min_confidence (float): Lower bound on confidence (0.5-1)
+        max_confidence (float): Upper bound on confidence (0.5-1)
+        split (str): 'train', 'test' or 'all'
+        page (int): 1-based page number
+        page_size (int): Rows per page
+        most_confident_first (bool): Sort by descending confidence if True
+
+    Returns:
+        pandas.DataFrame: The requested page
+    """
+    where, params = _where_clause(outcomes, min_confidence, max_confidence, split)
+    order = "DESC" if most_confident_first else "ASC"
+    offset = (max(page, 1) - 1) * page_size
+
+    connection = _connect_readonly(db_path)
+    try:
+        return pd.read_sql_query(
+            f"""
+            SELECT id, split, label, predicted, spam_probability, confidence, outcome, text
+            FROM predictions
+            WHERE {where}
+            ORDER BY confidence {order}, id {order}
+            LIMIT ? OFFSET ?
+            """,
+            connection,
+            params=params + [page_size, offset],
+        )
+    finally:
+        connection.close()
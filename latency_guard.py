@@ -0,0 +1,331 @@
+"""
+SMS Spam Classifier - Bounded-Cost Scoring
+
+Keeps the latency of a single prediction bounded no matter how large or
+unusual the input is. Without a guard, scoring cost grows with the input and
+some inputs are worse than linear: a long run of characters without
+whitespace makes the normalization regexes backtrack at every position, so a
+30,000-character run takes over a second and a pasted megabyte takes minutes.
+
+The guard bounds the work in three ways:
+
+    - Runs of non-whitespace longer than MAX_RUN_CHARS are cut to that length.
+      No real token is that long (the longest in the bundled dataset is 56
+      characters), and the cut bounds the regex cost per run.
+    - Text is scored in windows of about SEGMENT_CHARS characters, with each
+      edge moved back to whitespace so no word is split or lost. Every
+      message in the dataset fits in one window (the longest is 910
+      characters), so ordinary SMS are scored exactly as before. Longer inputs
+      are split into windows, and at most MAX_SEGMENTS evenly spaced windows
+      (always including the first and the last) are scored. A token needs at
+      least two characters plus a separator, so the scored text holds at most
+      (SEGMENT_CHARS + MAX_RUN_CHARS) * MAX_SEGMENTS / 3 tokens whatever the
+      input size.
+    - Windows are scored in growing batches and scoring stops when the time
+      budget is used up; at least the first window is always scored. The
+      budget is per request for score_guarded() and per batch for
+      score_guarded_batch().
+
+When several windows are scored, their evidence is combined by averaging the
+per-window class log-probabilities and renormalizing, so every scored window
+counts equally and a long input is not pushed to extreme confidence just
+because it repeats itself.
+
+score_guarded() scores one message for the app; score_guarded_batch() applies
+the same bounds to every record of a batch (streaming, model manager), so
+pathological records cannot stall the other records scored with them.
+
+Usage:
+    python latency_guard.py   # latency tables for pathological inputs, with and without the guard
+"""
+
+import re
+import sys
+import time
+
+import numpy as np
+
+from scoring import score_messages, spam_class_index
+
+
+MAX_RUN_CHARS = 100
+SEGMENT_CHARS = 1000
+MAX_SEGMENTS = 8
+TIME_BUDGET_MS = 50
+
+_LONG_RUN = re.compile(r'\S{%d,}' % (MAX_RUN_CHARS + 1))
+
+
+def _cut_long_runs(text):
+    return _LONG_RUN.sub(lambda match: match.group()[:MAX_RUN_CHARS], text)
+
+
+def _boundary(text, position):
+    # Move a window edge back onto whitespace so no word is split between two
+    # windows. Only a run longer than MAX_RUN_CHARS, which is cut anyway, can
+    # have no whitespace in reach; it is split where it is.
+    if position <= 0 or position >= len(text):
+        return min(max(position, 0), len(text))
+    for i in range(position, max(position - MAX_RUN_CHARS, 0) - 1, -1):
+        if text[i].isspace():
+            return i
+    return position
+
+
+def segment_message(text):
+    """
+    Split a message into the bounded windows that will be scored.
+
+    Window edges sit every SEGMENT_CHARS characters, each moved back to the
+    nearest whitespace, so every word lands in exactly one window and the
+    windows of an unsampled message add up to the whole text.
+
+    Args:
+        text (str): Message text of any length
+
+    Returns:
+        tuple: (segments, total_segments)
+            - segments (list): At most MAX_SEGMENTS window strings, in text order,
+              each at most SEGMENT_CHARS + MAX_RUN_CHARS characters long
+            - total_segments (int): Number of windows the full text spans
+    """
+    n_windows = max(1, -(-len(text) // SEGMENT_CHARS))
+    if n_windows <= MAX_SEGMENTS:
+        chosen = range(n_windows)
+    else:
+        chosen = np.unique(np.linspace(0, n_windows - 1, MAX_SEGMENTS).round().astype(int))
+
+    segments = [
+        _cut_long_runs(text[_boundary(text, i * SEGMENT_CHARS):_boundary(text, (i + 1) * SEGMENT_CHARS)])
+        for i in chosen
+    ]
+    return segments, n_windows
+
+
+def _score_windows(model, segments, deadline, head_log_probability=None):
+    # Head first, then the sampled windows in batches of 1, 2, 4, ... until the
+    # deadline (a perf_counter value) passes. The head may be scored already.
+    log_probability_sum = np.zeros(len(model.classes_))
+    scored = []
+    batch_size = 1
+    budget_exceeded = False
+    if head_log_probability is not None:
+        log_probability_sum += head_log_probability
+        scored.append(segments[0])
+        batch_size = 2
+    while len(scored) < len(segments):
+        if scored and time.perf_counter() >= deadline:
+            budget_exceeded = True
+            break
+        batch = segments[len(scored):len(scored) + batch_size]
+        log_probability_sum += model.predict_log_proba(batch).sum(axis=0)
+        scored.extend(batch)
+        batch_size *= 2
+    mean_log_probability = log_probability_sum / len(scored)
+    probabilities = np.exp(mean_log_probability - mean_log_probability.max())
+    probabilities /= probabilities.sum()
+    label = model.classes_[probabilities.argmax()]
+    return label, float(probabilities[spam_class_index(model)]), scored, budget_exceeded
+
+
+def score_guarded(model, message, time_budget_ms=TIME_BUDGET_MS, monitor=None):
+    """
+    Score one message with bounded cost.
+
+    Args:
+        model: Trained classifier pipeline
+        message (str): Message text of any length
+        time_budget_ms (float): Stop scoring further windows after this much time
+        monitor: Optional drift_monitor.DriftMonitor fed with the scored text
+
+    Returns:
+        dict: Prediction and a report of what was scored
+            - label (str): Predicted class
+            - spam_probability (float): Combined probability of spam (0-1)
+            - truncated (bool): True if any part of the input was not scored
+            - chars_total (int): Length of the input
+            - chars_scored (int): Characters actually scored
+            - segments_scored (int): Windows scored
+            - segments_total (int): Windows the full input spans
+            - budget_exceeded (bool): True if scoring stopped on the time budget
+            - elapsed_ms (float): Time spent scoring
+    """
+    start = time.perf_counter()
+    segments, total_segments = segment_message(message)
+
+    if len(segments) == 1:
+        # Ordinary messages take the regular path and score exactly as before
+        labels, spam_probabilities = score_messages(model, segments)
+        label, spam_probability = labels[0], float(spam_probabilities[0])
+        scored = segments
+        budget_exceeded = False
+    else:
+        label, spam_probability, scored, budget_exceeded = _score_windows(
+            model, segments, start + time_budget_ms / 1000
+        )
+
+    chars_scored = sum(len(segment) for segment in scored)
+    if monitor is not None:
+        # Observe the scored text, never the raw input: the monitor's
+        # tokenizer would otherwise reintroduce the unbounded cost.
+        monitor.observe([' '.join(scored)], np.array([label]), np.array([spam_probability]))
+
+    return {
+        'label': label,
+        'spam_probability': spam_probability,
+        'truncated': len(scored) < total_segments or chars_scored < len(message),
+        'chars_total': len(message),
+        'chars_scored': chars_scored,
+        'segments_scored': len(scored),
+        'segments_total': total_segments,
+        'budget_exceeded': budget_exceeded,
+        'elapsed_ms': (time.perf_counter() - start) * 1000,
+    }
+
+
+def score_guarded_batch(model, messages, time_budget_ms=TIME_BUDGET_MS, monitor=None):
+    """
+    Score a batch of messages with the bounds of score_guarded applied to each.
+
+    Messages that fit in one window (every ordinary SMS) are scored together
+    in one vectorized call, exactly as scoring.score_messages would score
+    them. Longer messages get their first window scored in one more
+    vectorized call; their remaining windows are then scored while the time
+    budget lasts. The budget covers the whole batch, not each record, so a
+    batch made only of huge records costs about as much as a single one. The
+    monitor sees the bounded text only.
+
+    Args:
+        model: Trained classifier pipeline
+        messages: Iterable of message strings of any length
+        time_budget_ms (float): Budget for the whole batch; once it is spent,
+            long messages are scored on the windows scored so far
+        monitor: Optional drift_monitor.DriftMonitor fed with the scored text
+
+    Returns:
+        tuple: (labels, spam_probabilities) as from scoring.score_messages
+    """
+    start = time.perf_counter()
+    messages = list(messages)
+    if not messages:
+        return np.array([], dtype=object), np.array([], dtype=float)
+
+    segmented = [segment_message(message)[0] for message in messages]
+    single = [i for i, segments in enumerate(segmented) if len(segments) == 1]
+    multi = [i for i, segments in enumerate(segmented) if len(segments) > 1]
+    labels = np.empty(len(messages), dtype=object)
+    spam_probabilities = np.empty(len(messages), dtype=float)
+    scored_texts = [None] * len(messages)
+
+    if single:
+        texts = [segmented[i][0] for i in single]
+        labels[single], spam_probabilities[single] = score_messages(model, texts)
+        for i, text in zip(single, texts):
+            scored_texts[i] = text
+    if multi:
+        deadline = start + time_budget_ms / 1000
+        heads = model.predict_log_proba([segmented[i][0] for i in multi])
+        for i, head_log_probability in zip(multi, heads):
+            labels[i], spam_probabilities[i], scored, _ = _score_windows(
+                model, segmented[i], deadline, head_log_probability
+            )
+            scored_texts[i] = ' '.join(scored)
+
+    labels = labels.astype(model.classes_.dtype)
+    if monitor is not None:
+        monitor.observe(scored_texts, labels, spam_probabilities)
+    return labels, spam_probabilities
+
+
+# Inputs that stress different parts of the pipeline
+PATHOLOGICAL_INPUTS = {
+    'words': lambda n: ('WINNER free prize call now claim ' * (n // 33 + 1))[:n],
+    'no_whitespace': lambda n: 'a' * n,
+    'alphanumeric': lambda n: ('ab1' * (n // 3 + 1))[:n],
+    'digits': lambda n: '1' * n,
+    'dotted': lambda n: ('a.' * (n // 2 + 1))[:n],
+}
+
+
+def benchmark(model_path='spam_model.joblib', sizes=(1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+              repeats=20, unguarded_max_chars=20_000, batch_size=64):
+    """
+    Print guarded and unguarded latency for pathological inputs of growing size.
+
+    The second table covers the batch path used by streaming and the model
+    manager: a batch of ordinary messages with one pathological record, and a
+    batch made only of pathological records, scored with the drift monitor
+    attached.
+
+    Unguarded scoring is only timed up to unguarded_max_chars because its cost
+    grows quadratically for some inputs.
+    """
+    import joblib
+
+    from drift_monitor import DriftMonitor
+
+    model = joblib.load(model_path)
+    score_guarded(model, 'warm up')
+
+    def percentiles_ms(func, text, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func(text)
+            timings.append(time.perf_counter() - start)
+        return np.percentile(timings, [50, 99]) * 1000, max(timings) * 1000
+
+    print("=" * 86)
+    print(f"WORST-CASE LATENCY (budget {TIME_BUDGET_MS} ms, {repeats} runs per guarded cell)")
+    print("=" * 86)
+    print(f"{'Input':<15}{'Chars':>12}{'Unguarded ms':>14}{'Guarded p50':>13}"
+          f"{'p99':>9}{'max':>9}{'Windows':>14}")
+    print("-" * 86)
+    worst_ms = 0.0
+    for name, make in PATHOLOGICAL_INPUTS.items():
+        for size in sizes:
+            text = make(size)
+            if size <= unguarded_max_chars:
+                (unguarded_ms, _), _ = percentiles_ms(lambda t: score_messages(model, [t]), text, 1)
+                unguarded = f"{unguarded_ms:.1f}"
+            else:
+                unguarded = "skipped"
+            (p50, p99), slowest = percentiles_ms(lambda t: score_guarded(model, t), text, repeats)
+            worst_ms = max(worst_ms, slowest)
+            report = score_guarded(model, text)
+            windows = f"{report['segments_scored']}/{report['segments_total']}"
+            print(f"{name:<15}{size:>12,}{unguarded:>14}{p50:>13.1f}{p99:>9.1f}{slowest:>9.1f}{windows:>14}")
+    print("=" * 86)
+    print(f"Slowest guarded request: {worst_ms:.1f} ms")
+
+    ordinary = PATHOLOGICAL_INPUTS['words'](160)
+    print()
+    print("=" * 86)
+    print(f"BATCH PATH: {batch_size} messages, 1 or all pathological, drift monitor on")
+    print("=" * 86)
+    print(f"{'Input':<15}{'Chars':>12}{'Bad':>5}{'Unguarded ms':>14}{'Guarded p50':>13}{'p99':>9}{'max':>9}")
+    print("-" * 86)
+    worst_batch_ms = 0.0
+    for name, make in PATHOLOGICAL_INPUTS.items():
+        for size, bad in ((unguarded_max_chars, 1), (max(sizes), 1), (max(sizes), batch_size)):
+            batch = [ordinary] * (batch_size - bad) + [make(size)] * bad
+            if size <= unguarded_max_chars:
+                (unguarded_ms, _), _ = percentiles_ms(
+                    lambda b: score_messages(model, b, monitor=DriftMonitor(model)), batch, 1
+                )
+                unguarded = f"{unguarded_ms:.1f}"
+            else:
+                unguarded = "skipped"
+            monitor = DriftMonitor(model)
+            (p50, p99), slowest = percentiles_ms(
+                lambda b: score_guarded_batch(model, b, monitor=monitor), batch, repeats
+            )
+            worst_batch_ms = max(worst_batch_ms, slowest)
+            print(f"{name:<15}{size:>12,}{bad:>5}{unguarded:>14}{p50:>13.1f}{p99:>9.1f}{slowest:>9.1f}")
+    print("=" * 86)
+    print(f"Slowest guarded batch: {worst_batch_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark())
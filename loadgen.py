@@ -0,0 +1,382 @@
+"""
+SMS Spam Classifier - Load Generator
+
+Replays messages from the bundled dataset against a scoring target at a
+configurable request rate and concurrency, and reports throughput, latency
+percentiles (p50/p95/p99/p99.9) and error rates per time window and overall.
+
+Targets:
+    - inprocess: the loaded pipeline, scored one message per request exactly
+      like app.predict_message does, from a pool of worker threads
+    - http: any local serving endpoint that accepts a JSON POST of
+      {"message": "..."}
+
+Two load models are supported:
+    - Open loop (--rate N): requests are issued on a fixed schedule of N per
+      second regardless of how fast earlier ones complete. Latency is measured
+      from the scheduled send time, so queueing delay behind a saturated
+      target is included instead of hidden (no coordinated omission).
+      At most --max-in-flight requests are queued or running; requests
+      issued beyond that, or still queued at the end of the run, are
+      counted as dropped errors instead of piling up without bound.
+    - Closed loop (no --rate): each of --concurrency workers sends its next
+      request as soon as the previous one returns.
+
+Usage:
+    python loadgen.py --concurrency 8 --duration 30
+    python loadgen.py --rate 500 --concurrency 16 --duration 60
+    python loadgen.py --target http --url http://localhost:8000/predict --rate 200
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from latency_guard import score_guarded
+
+
+PERCENTILES = [50, 95, 99, 99.9]
+
+
+def load_messages(file_path='sms_spam_no_header.csv'):
+    """
+    Load the messages to replay.
+
+    Args:
+        file_path (str): Path to the CSV dataset
+
+    Returns:
+        list: Message strings in file order
+    """
+    df = pd.read_csv(file_path, header=None, names=['label', 'text'])
+    return df['text'].tolist()
+
+
+def make_inprocess_target(model_path='spam_model.joblib'):
+    """
+    Build a target that scores one message with the in-process pipeline.
+
+    Args:
+        model_path (str): Path to the saved model pipeline
+
+    Returns:
+        callable: Function taking a message and returning its label
+    """
+    model = joblib.load(model_path)
+
+    def target(message):
+        return score_guarded(model, message)['label']
+
+    return target
+
+
+def make_http_target(url, timeout=10.0):
+    """
+    Build a target that POSTs one message as JSON to a serving endpoint.
+
+    Args:
+        url (str): Endpoint URL
+        timeout (float): Per-request timeout in seconds
+
+    Returns:
+        callable: Function taking a message and returning the decoded response
+
+    Non-2xx responses and timeouts raise, and are counted as errors.
+    """
+    def target(message):
+        body = json.dumps({'message': message}).encode('utf-8')
+        request = urllib.request.Request(
+            url, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read() or b'null')
+
+    return target
+
+
+class LoadRecorder:
+    """
+    Thread-safe collector of per-request results.
+
+    Each record is (completion time, latency seconds, ok) with times relative
+    to the start of the run. Dropped requests have a NaN latency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = []
+
+    def record(self, completed_at, latency, ok):
+        with self._lock:
+            self._records.append((completed_at, latency, ok))
+
+    def snapshot(self):
+        """
+        Returns:
+            numpy.ndarray: Array of shape (n, 3) with the records so far
+        """
+        with self._lock:
+            return np.array(self._records, dtype=float).reshape(-1, 3)
+
+
+def summarize(records, elapsed):
+    """
+    Compute throughput, error rate and latency percentiles.
+
+    Args:
+        records (numpy.ndarray): Records from LoadRecorder.snapshot
+        elapsed (float): Wall-clock length of the measured window in seconds
+
+    Returns:
+        dict: Summary statistics (latencies in milliseconds)
+    """
+    total = len(records)
+    ok = records[:, 2].astype(bool) if total else np.array([], dtype=bool)
+    latencies_ms = records[ok, 1] * 1000 if total else np.array([])
+
+    dropped = int(np.isnan(records[:, 1]).sum()) if total else 0
+
+    summary = {
+        'requests': total,
+        'errors': int(total - ok.sum()),
+        'dropped': dropped,
+        'error_rate': float((total - ok.sum()) / total) if total else 0.0,
+        # Requests actually sent to the target, dropped ones excluded
+        'throughput': (total - dropped) / elapsed if elapsed > 0 else 0.0,
+    }
+    for p in PERCENTILES:
+        key = f"p{p:g}".replace('.', '')
+        summary[key] = float(np.percentile(latencies_ms, p)) if len(latencies_ms) else float('nan')
+    summary['max'] = float(latencies_ms.max()) if len(latencies_ms) else float('nan')
+    return summary
+
+
+def run_load(target, messages, concurrency=4, rate=None, duration=10.0,
+             interval=1.0, warmup=1.0, report=print, max_in_flight=None):
+    """
+    Replay messages against a target and collect per-request latencies.
+
+    Args:
+        target (callable): Function that handles one message
+        messages (list): Messages to replay, cycled as needed
+        concurrency (int): Number of worker threads
+        rate (float): Requests per second for an open-loop run, or None for a
+            closed loop driven by the workers
+        duration (float): Length of the measured run in seconds
+        interval (float): Length of each reporting window in seconds
+        warmup (float): Seconds of traffic sent before measuring starts
+        report (callable): Receives one formatted line per window
+        max_in_flight (int): Open loop only; most requests queued or running
+            at once (default: 4 x concurrency). Requests over the cap are
+            dropped and counted as errors.
+
+    Returns:
+        dict: Overall summary from summarize(), plus a 'windows' list
+    """
+    if warmup > 0:
+        warmup_deadline = time.perf_counter() + warmup
+        for message in itertools.cycle(messages):
+            if time.perf_counter() >= warmup_deadline:
+                break
+            try:
+                target(message)
+            except Exception:
+                pass
+
+    recorder = LoadRecorder()
+    stop = threading.Event()
+    start = time.perf_counter()
+    end = start + duration
+
+    def drop():
+        recorder.record(time.perf_counter() - start, float('nan'), False)
+
+    def call(message, issued_at):
+        if time.perf_counter() >= end:
+            # Queued past the end of the run: it would only extend the run
+            drop()
+            return
+        try:
+            target(message)
+            ok = True
+        except Exception:
+            ok = False
+        now = time.perf_counter()
+        recorder.record(now - start, now - issued_at, ok)
+
+    def closed_loop_worker(worker_messages):
+        for message in worker_messages:
+            if stop.is_set() or time.perf_counter() >= end:
+                return
+            call(message, time.perf_counter())
+
+    slots = threading.BoundedSemaphore(max_in_flight or 4 * concurrency)
+
+    def release(future):
+        slots.release()
+        if future.cancelled():
+            drop()
+
+    def open_loop_dispatcher(executor):
+        for i, message in enumerate(itertools.cycle(messages)):
+            scheduled = start + i / rate
+            if scheduled >= end or stop.is_set():
+                return
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not slots.acquire(blocking=False):
+                drop()
+                continue
+            executor.submit(call, message, scheduled).add_done_callback(release)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    if rate:
+        driver = threading.Thread(target=open_loop_dispatcher, args=(executor,), daemon=True)
+    else:
+        # Each worker starts at a different offset so they don't replay in lockstep
+        offset = max(1, len(messages) // concurrency)
+        driver = None
+        for w in range(concurrency):
+            worker_messages = itertools.islice(
+                itertools.cycle(messages), w * offset, None
+            )
+            executor.submit(closed_loop_worker, worker_messages)
+    if driver is not None:
+        driver.start()
+
+    windows = []
+    window_start = 0.0
+    try:
+        while window_start < duration:
+            window_end = min(window_start + interval, duration)
+            time.sleep(max(0.0, start + window_end - time.perf_counter()))
+            records = recorder.snapshot()
+            in_window = records[(records[:, 0] >= window_start) & (records[:, 0] < window_end)]
+            window = summarize(in_window, window_end - window_start)
+            window['t'] = window_end
+            windows.append(window)
+            report(format_window(window))
+            window_start = window_end
+    except KeyboardInterrupt:
+        report("Interrupted, finishing in-flight requests...")
+    finally:
+        stop.set()
+        if driver is not None:
+            driver.join()
+        # Queued requests are cancelled (and counted as dropped); only the
+        # ones already running are waited for
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    summary = summarize(recorder.snapshot(), elapsed)
+    summary['windows'] = windows
+    return summary
+
+
+def format_window(window):
+    """
+    Format one reporting window as a table row.
+    """
+    return (
+        f"{window['t']:>7.1f}s {window['requests']:>8d} {window['throughput']:>10.1f} "
+        f"{window['error_rate'] * 100:>7.2f}% {window['p50']:>9.2f} {window['p95']:>9.2f} "
+        f"{window['p99']:>9.2f} {window['p999']:>9.2f}"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the SMS spam classifier")
+    parser.add_argument('--target', choices=['inprocess', 'http'], default='inprocess',
+                        help="What to send load to (default: inprocess)")
+    parser.add_argument('--url', default='http://localhost:8000/predict',
+                        help="Endpoint for --target http")
+    parser.add_argument('--model', default='spam_model.joblib',
+                        help="Model file for --target inprocess")
+    parser.add_argument('--dataset', default='sms_spam_no_header.csv',
+                        help="CSV file whose messages are replayed")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Number of worker threads (default: 4)")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="Open-loop request rate per second (default: closed loop)")
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help="Open loop: cap on queued + running requests, "
+                             "extra requests are dropped (default: 4 x concurrency)")
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help="Measured run length in seconds (default: 10)")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help="Reporting window in seconds (default: 1)")
+    parser.add_argument('--warmup', type=float, default=1.0,
+                        help="Warm-up seconds before measuring (default: 1)")
+    parser.add_argument('--timeout', type=float, default=10.0,
+                        help="Per-request timeout for --target http (default: 10)")
+    parser.add_argument('--output', default=None,
+                        help="Optional path to write the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the load generator from the command line.
+    """
+    args = parse_args(argv)
+
+    messages = load_messages(args.dataset)
+    if args.target == 'http':
+        target = make_http_target(args.url, timeout=args.timeout)
+        target_name = args.url
+    else:
+        target = make_inprocess_target(args.model)
+        target_name = f"in-process ({args.model})"
+
+    mode = f"open loop at {args.rate:g} req/s" if args.rate else "closed loop"
+    print("=" * 78)
+    print("SMS SPAM CLASSIFIER - LOAD TEST")
+    print("=" * 78)
+    print(f"Target:      {target_name}")
+    print(f"Messages:    {len(messages)} from '{args.dataset}'")
+    print(f"Load:        {mode}, concurrency {args.concurrency}, {args.duration:g}s")
+    print()
+    print(f"{'time':>8} {'requests':>8} {'req/s':>10} {'errors':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'p99.9 ms':>9}")
+    print("-" * 78)
+
+    summary = run_load(
+        target, messages,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        duration=args.duration,
+        interval=args.interval,
+        warmup=args.warmup,
+        max_in_flight=args.max_in_flight,
+    )
+
+    print("=" * 78)
+    print("SUMMARY")
+    print("=" * 78)
+    print(f"Requests:    {summary['requests']} ({summary['errors']} errors, "
+          f"{summary['error_rate'] * 100:.2f}%, {summary['dropped']} dropped)")
+    print(f"Throughput:  {summary['throughput']:.1f} req/s")
+    print(f"Latency ms:  p50 {summary['p50']:.2f} | p95 {summary['p95']:.2f} | "
+          f"p99 {summary['p99']:.2f} | p99.9 {summary['p999']:.2f} | max {summary['max']:.2f}")
+    print("=" * 78)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to '{args.output}'")
+
+    return 1 if summary['requests'] and summary['error_rate'] == 1.0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
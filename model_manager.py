@@ -0,0 +1,336 @@
+"""
+SMS Spam Classifier - Multi-Model Manager
+
+Serves many named models from one directory, e.g. one per carrier and
+region. Each model lives in '<model_dir>/<key>.joblib' and is loaded lazily
+the first time its key is requested. Loaded pipelines stay resident in an
+in-memory LRU; when their estimated total size exceeds the memory budget, the
+least recently used ones are evicted. Per-model hit, load and eviction
+counters are kept for monitoring.
+
+Model files are checked on every request: when a file is replaced (for
+example by a retraining job swapping in a validated model), the next request
+loads the new version. Until then the resident version keeps serving.
+
+The key 'default' falls back to the single 'spam_model.joblib' file when the
+model directory has no 'default.joblib', so existing setups keep working.
+
+Usage:
+    manager = ModelManager('models', memory_budget_mb=256)
+    labels, spam_probabilities = manager.score('uk-vodafone', messages)
+    print(manager.stats())
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+from drift_monitor import DriftMonitor, load_reference, reference_path_for
+from latency_guard import score_guarded_batch
+
+
+MODEL_DIR = 'models'
+DEFAULT_MODEL_KEY = 'default'
+DEFAULT_MODEL_PATH = 'spam_model.joblib'
+MODEL_EXTENSION = '.joblib'
+
+# Model keys double as file names, so keep them to a safe character set
+_VALID_KEY = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+def estimate_model_bytes(obj, _seen=None):
+    """
+    Estimate the in-memory size of a fitted pipeline.
+
+    Walks estimator attributes and sums numpy array and sparse matrix buffers,
+    plus the strings and containers of Python-level state such as the TF-IDF
+    vocabulary. Shared objects are counted once.
+
+    Args:
+        obj: Fitted pipeline or any attribute reachable from it
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            return obj.nbytes + sum(estimate_model_bytes(item, _seen) for item in obj.ravel())
+        return obj.nbytes
+    if scipy.sparse.issparse(obj):
+        return sum(
+            getattr(obj, name).nbytes
+            for name in ('data', 'indices', 'indptr', 'row', 'col')
+            if hasattr(obj, name)
+        )
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_model_bytes(k, _seen) + estimate_model_bytes(v, _seen)
+            for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_model_bytes(item, _seen) for item in obj)
+    if hasattr(obj, '__dict__') and not isinstance(obj, type):
+        return sys.getsizeof(obj) + estimate_model_bytes(vars(obj), _seen)
+    return sys.getsizeof(obj)
+
+
+class ModelStats:
+    """
+    Counters for one model key.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+        self.size_bytes = 0
+        self.last_used = None
+
+
+class ModelManager:
+    """
+    Lazy-loading, memory-bounded LRU cache of named model pipelines.
+
+    Thread-safe: concurrent requests for a model that is not resident
+    trigger a single load, and the other requests wait for it.
+
+    Args:
+        model_dir (str): Directory holding '<key>.joblib' files
+        memory_budget_mb (float): Total estimated size of resident models
+            before least recently used ones are evicted
+        default_path (str): File served for the 'default' key when the
+            directory has no 'default.joblib'
+        monitor_drift (bool): Feed every scored batch to a per-model
+            drift monitor (see drift_monitor.py)
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, memory_budget_mb=256, default_path=DEFAULT_MODEL_PATH,
+                 monitor_drift=True):
+        self.model_dir = model_dir
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.default_path = default_path
+        self.monitor_drift = monitor_drift
+        self._monitors = {}              # key -> DriftMonitor
+        self._lock = threading.Lock()
+        self._resident = OrderedDict()   # key -> model, least recently used first
+        self._loading = {}               # key -> threading.Event while a load runs
+        self._versions = {}              # key -> (path, mtime_ns) of the resident model
+        self._stats = {}
+
+    def model_path(self, key):
+        """
+        Resolve a model key to its file.
+
+        Raises:
+            KeyError: If the key is malformed or no such model exists
+        """
+        if not isinstance(key, str) or not _VALID_KEY.match(key):
+            raise KeyError(f"Invalid model key: {key!r}")
+
+        path = os.path.join(self.model_dir, key + MODEL_EXTENSION)
+        if os.path.exists(path):
+            return path
+        if key == DEFAULT_MODEL_KEY and os.path.exists(self.default_path):
+            return self.default_path
+        raise KeyError(f"Model '{key}' not found in '{self.model_dir}'")
+
+    def available_models(self):
+        """
+        List the model keys that can be served.
+
+        Returns:
+            list: Sorted model keys
+        """
+        keys = set()
+        if os.path.isdir(self.model_dir):
+            keys.update(
+                name[:-len(MODEL_EXTENSION)]
+                for name in os.listdir(self.model_dir)
+                if name.endswith(MODEL_EXTENSION) and _VALID_KEY.match(name[:-len(MODEL_EXTENSION)])
+            )
+        if os.path.exists(self.default_path):
+            keys.add(DEFAULT_MODEL_KEY)
+        return sorted(keys)
+
+    def _file_version(self, key):
+        # None if the file is gone; the resident model then keeps serving
+        try:
+            path = self.model_path(key)
+            return path, os.stat(path).st_mtime_ns
+        except (KeyError, OSError):
+            return None
+
+    def get(self, key):
+        """
+        Return the model for a key, loading it if it is not resident or if
+        its file has been replaced since it was loaded.
+
+        Args:
+            key (str): Model key
+
+        Returns:
+            model: Loaded scikit-learn pipeline
+
+        Raises:
+            KeyError: If no model exists for the key
+            RuntimeError: If the model file cannot be loaded
+        """
+        version = self._file_version(key)
+        while True:
+            with self._lock:
+                if key in self._resident and version is not None and version != self._versions[key]:
+                    # Replaced on disk: drop it so this request loads the new file
+                    del self._resident[key]
+                    self._monitors.pop(key, None)
+                    self._stats[key].reloads += 1
+                if key in self._resident:
+                    self._resident.move_to_end(key)
+                    stats = self._stats[key]
+                    stats.hits += 1
+                    stats.last_used = time.time()
+                    return self._resident[key]
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = self._loading[key] = threading.Event()
+                    break
+            # Another thread is loading this key; wait and look again
+            pending.wait()
+
+        try:
+            path = self.model_path(key)
+            version = self._file_version(key)
+            start = time.perf_counter()
+            try:
+                model = joblib.load(path)
+            except Exception as e:
+                raise RuntimeError(f"Failed to load model '{key}': {e}")
+            load_seconds = time.perf_counter() - start
+            size_bytes = estimate_model_bytes(model)
+
+            with self._lock:
+                stats = self._stats.setdefault(key, ModelStats())
+                stats.loads += 1
+                stats.load_seconds += load_seconds
+                stats.size_bytes = size_bytes
+                stats.last_used = time.time()
+                self._resident[key] = model
+                self._versions[key] = version
+                self._evict_over_budget(keep=key)
+            return model
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def _evict_over_budget(self, keep):
+        # Caller holds the lock. The model just requested is never evicted,
+        # even if it alone exceeds the budget.
+        while self.resident_bytes() > self.memory_budget_bytes:
+            victim = next((k for k in self._resident if k != keep), None)
+            if victim is None:
+                return
+            del self._resident[victim]
+            self._monitors.pop(victim, None)
+            self._stats[victim].evictions += 1
+
+    def resident_bytes(self):
+        """
+        Returns:
+            int: Estimated total size of resident models
+        """
+        return sum(self._stats[key].size_bytes for key in self._resident)
+
+    def score(self, key, messages):
+        """
+        Score a batch of messages with the model for a key.
+
+        Each message is scored with the bounds of latency_guard, so one very
+        long or pathological record cannot stall the rest of its batch.
+
+        Returns:
+            tuple: (labels, spam_probabilities) as from scoring.score_messages
+        """
+        model = self.get(key)
+        return score_guarded_batch(model, messages, monitor=self.drift_monitor(key))
+
+    def drift_monitor(self, key):
+        """
+        Drift monitor for a model key, created on first use.
+
+        The monitor compares live traffic with the reference profile saved
+        next to the model file. It is dropped when the model is evicted,
+        since it holds on to the model's vocabulary.
+
+        Returns:
+            DriftMonitor: Monitor for the key, or None if monitoring is off
+        """
+        if not self.monitor_drift:
+            return None
+        with self._lock:
+            monitor = self._monitors.get(key)
+        if monitor is None:
+            model = self.get(key)
+            monitor = DriftMonitor(model, load_reference(reference_path_for(self.model_path(key))))
+            with self._lock:
+                monitor = self._monitors.setdefault(key, monitor)
+        return monitor
+
+    def drift_reports(self):
+        """
+        Drift reports of all models that have a monitor.
+
+        Returns:
+            dict: Model key -> DriftMonitor.report()
+        """
+        with self._lock:
+            monitors = dict(self._monitors)
+        return {key: monitor.report() for key, monitor in sorted(monitors.items())}
+
+    def evict(self, key):
+        """
+        Drop a model from memory; it is reloaded on next use.
+        """
+        with self._lock:
+            self._monitors.pop(key, None)
+            if self._resident.pop(key, None) is not None:
+                self._stats[key].evictions += 1
+
+    def stats(self):
+        """
+        Per-model counters, most recently used first.
+
+        Returns:
+            pandas.DataFrame: One row per key that has been requested
+        """
+        with self._lock:
+            rows = [
+                {
+                    'model': key,
+                    'resident': key in self._resident,
+                    'hits': stats.hits,
+                    'loads': stats.loads,
+                    'reloads': stats.reloads,
+                    'evictions': stats.evictions,
+                    'load_ms': stats.load_seconds / stats.loads * 1000 if stats.loads else 0.0,
+                    'size_mb': stats.size_bytes / (1024 * 1024),
+                    'last_used': pd.Timestamp(stats.last_used, unit='s') if stats.last_used else pd.NaT,
+                }
+                for key, stats in self._stats.items()
+            ]
+        columns = ['model', 'resident', 'hits', 'loads', 'reloads', 'evictions', 'load_ms', 'size_mb', 'last_used']
+        return pd.DataFrame(rows, columns=columns).sort_values('last_used', ascending=False, ignore_index=True)
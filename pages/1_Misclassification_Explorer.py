@@ -0,0 +1,184 @@
+"""
+SMS Spam Classifier - Misclassification Explorer
+
+Streamlit page for browsing per-message predictions from 'predictions.db'.
+Filtering, sorting and pagination all run as SQL queries against the indexed
+store, so each interaction only transfers one page of rows to the browser.
+
+The store is written by 'python train.py'. If it is missing, it is built
+once from 'spam_model.joblib' and the bundled dataset, with the train/test
+split recreated the way train.py makes it.
+"""
+
+import os
+import threading
+
+import joblib
+import pandas as pd
+import streamlit as st
+from sklearn.model_selection import train_test_split
+
+from explorer import (
+    OUTCOME_LABELS,
+    OUTCOMES,
+    PREDICTIONS_PATH,
+    build_predictions_db,
+    count_outcomes,
+    count_predictions,
+    query_predictions,
+)
+
+
+st.set_page_config(
+    page_title="Misclassification Explorer",
+    page_icon="🔎",
+    layout="wide",
+)
+
+
+@st.cache_resource
+def build_lock():
+    """
+    Lock shared by all sessions, so a missing store is built only once.
+
+    Returns:
+        threading.Lock: Build lock
+    """
+    return threading.Lock()
+
+
+def ensure_predictions_db(db_path=PREDICTIONS_PATH, model_path='spam_model.joblib',
+                          dataset_path='sms_spam_no_header.csv'):
+    """
+    Make sure the prediction store exists, building it if necessary.
+
+    Checked on every run, so a store created by train.py after the page was
+    first opened, or one that was deleted, is noticed.
+
+    Returns:
+        bool: True if the store is available
+    """
+    if os.path.exists(db_path):
+        return True
+    if not (os.path.exists(model_path) and os.path.exists(dataset_path)):
+        return False
+
+    with build_lock():
+        # Another session may have built it while this one waited
+        if not os.path.exists(db_path):
+            model = joblib.load(model_path)
+            df = pd.read_csv(dataset_path, header=None, names=['label', 'text'])
+            # Same split as train.split_data, so the Split filter works
+            _, X_test = train_test_split(
+                df['text'], test_size=0.2, random_state=42, stratify=df['label']
+            )
+            build_predictions_db(model, df, db_path, test_index=X_test.index)
+    return True
+
+
+def main():
+    """
+    Explorer page.
+    """
+    st.title("🔎 Misclassification Explorer")
+    st.markdown("Browse every scored message, filtered by outcome and confidence.")
+
+    with st.spinner("Preparing prediction store..."):
+        available = ensure_predictions_db()
+    if not available:
+        st.error(
+            "❌ **Prediction store not found.** Run `python train.py` to train the "
+            "model and score the dataset, then refresh this page."
+        )
+        st.stop()
+
+    # Filters
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        outcomes = st.multiselect(
+            "Outcome",
+            options=OUTCOMES,
+            default=['false_positive', 'false_negative'],
+            format_func=OUTCOME_LABELS.get,
+        )
+    with col2:
+        min_confidence, max_confidence = st.slider(
+            "Confidence range",
+            min_value=0.5,
+            max_value=1.0,
+            value=(0.5, 1.0),
+            step=0.01,
+            help="Probability the model assigned to its predicted class",
+        )
+    with col3:
+        split = st.selectbox(
+            "Split",
+            options=['all', 'train', 'test'],
+            help="Rows held out for testing by train.py, or the rows it was trained on",
+        )
+
+    counts = count_outcomes(split=split)
+    metric_columns = st.columns(len(OUTCOMES))
+    for column, outcome in zip(metric_columns, OUTCOMES):
+        column.metric(OUTCOME_LABELS[outcome].split(' (')[0], f"{counts[outcome]:,}")
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        page_size = st.selectbox("Rows per page", options=[25, 50, 100, 200], index=1)
+    with col2:
+        most_confident_first = st.toggle("Most confident first", value=True)
+
+    # Go back to the first page whenever the filters change
+    filters = (tuple(outcomes), min_confidence, max_confidence, split, page_size, most_confident_first)
+    if st.session_state.get('explorer_filters') != filters:
+        st.session_state.explorer_filters = filters
+        st.session_state.explorer_page = 1
+
+    total = count_predictions(
+        outcomes=outcomes,
+        min_confidence=min_confidence,
+        max_confidence=max_confidence,
+        split=split,
+    )
+    total_pages = max(1, -(-total // page_size))
+    page = st.number_input(
+        f"Page (of {total_pages:,})",
+        min_value=1,
+        max_value=total_pages,
+        key='explorer_page',
+    )
+
+    if total == 0:
+        st.info("💡 No messages match these filters.")
+        return
+
+    rows = query_predictions(
+        outcomes=outcomes,
+        min_confidence=min_confidence,
+        max_confidence=max_confidence,
+        split=split,
+        page=page,
+        page_size=page_size,
+        most_confident_first=most_confident_first,
+    )
+
+    first = (page - 1) * page_size + 1
+    st.caption(f"Showing {first:,}–{first + len(rows) - 1:,} of {total:,} matching messages")
+
+    rows['outcome'] = rows['outcome'].map(lambda outcome: OUTCOME_LABELS[outcome].split(' (')[0])
+    st.dataframe(
+        rows[['id', 'label', 'predicted', 'confidence', 'spam_probability', 'outcome', 'split', 'text']],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'id': st.column_config.NumberColumn("Row", format="%d"),
+            'confidence': st.column_config.ProgressColumn(
+                "Confidence", min_value=0.5, max_value=1.0, format="%.3f"
+            ),
+            'spam_probability': st.column_config.NumberColumn("P(spam)", format="%.3f"),
+            'text': st.column_config.TextColumn("Message", width="large"),
+        },
+    )
+
+
+main()
@@ -0,0 +1,182 @@
+"""
+SMS Spam Classifier - Retrain Model
+
+Streamlit page that retrains the model in the background with one click.
+The job runs the train.py pipeline in a separate process (see retrain_job.py),
+so this page and the classifier stay responsive. Stage progress and the
+evaluation metrics are shown as the job reports them. The current model keeps
+serving until the new one has been validated and swapped in.
+"""
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+from retrain_job import FINAL_STATUSES, JOB_STAGES, MAX_ACCURACY_DROP, MIN_ACCURACY, JobRunner
+
+
+st.set_page_config(
+    page_title="Retrain Model",
+    page_icon="🔁",
+    layout="centered",
+)
+
+STATUS_BANNERS = {
+    'succeeded': (st.success, "✅ **New model swapped in.**"),
+    'rejected': (st.warning, "⚠️ **New model rejected; the current model is still serving.**"),
+    'failed': (st.error, "❌ **Training failed; the current model is still serving.**"),
+    'cancelled': (st.info, "⏹️ **Training cancelled; the current model is still serving.**"),
+}
+
+
+@st.cache_resource
+def load_runner():
+    """
+    Job runner shared by all sessions.
+
+    Returns:
+        JobRunner: Runner for the background retraining job
+    """
+    return JobRunner()
+
+
+def display_metrics(metrics):
+    """
+    Show the evaluation metrics received so far.
+
+    Args:
+        metrics (dict): Metric name -> value, from the job state
+    """
+    if 'accuracy' not in metrics:
+        return
+    st.markdown("### 📈 Evaluation")
+
+    current = metrics.get('current_accuracy')
+    col1, col2 = st.columns(2)
+    col1.metric(
+        "New model accuracy",
+        f"{metrics['accuracy'] * 100:.2f}%",
+        delta=f"{(metrics['accuracy'] - current) * 100:+.2f} pts" if current is not None else None,
+    )
+    if current is not None:
+        col2.metric("Current model accuracy", f"{current * 100:.2f}%")
+
+    if 'confusion_matrix' in metrics:
+        cm = metrics['confusion_matrix']
+        st.markdown("#### Confusion Matrix")
+        st.dataframe(
+            pd.DataFrame(cm, index=['Actual ham', 'Actual spam'], columns=['Predicted ham', 'Predicted spam']),
+            use_container_width=True,
+        )
+
+    per_class = {
+        label: metrics[f'{label}_metrics']
+        for label in ['ham', 'spam']
+        if f'{label}_metrics' in metrics
+    }
+    if per_class:
+        st.markdown("#### Per-Class Metrics")
+        st.dataframe(
+            pd.DataFrame(per_class).T,
+            use_container_width=True,
+            column_config={
+                'precision': st.column_config.NumberColumn("Precision", format="%.3f"),
+                'recall': st.column_config.NumberColumn("Recall", format="%.3f"),
+                'f1-score': st.column_config.NumberColumn("F1", format="%.3f"),
+                'support': st.column_config.NumberColumn("Support", format="%d"),
+            },
+        )
+
+
+def display_job(runner):
+    """
+    Show the state of the latest job: stages, metrics and outcome.
+
+    Args:
+        runner (JobRunner): Job runner
+    """
+    state = runner.state()
+    running = state['status'] == 'running'
+
+    if state['status'] == 'idle':
+        if runner.is_running():
+            st.info("⏳ Starting training job...")
+        else:
+            st.info("💡 No training job has run yet.")
+        return
+
+    if running:
+        elapsed = time.time() - state['started']
+        label = state['stage'] or "Starting"
+        if state['cancel_requested'] is not None:
+            label = f"Cancelling after: {label}"
+        st.progress(state['step'] / len(JOB_STAGES), text=f"{label} ({elapsed:.0f} s)")
+    else:
+        show, title = STATUS_BANNERS[state['status']]
+        show(f"{title} {state['message'] or ''}")
+        st.caption(
+            f"Finished {pd.Timestamp(state['finished'], unit='s'):%Y-%m-%d %H:%M:%S} UTC "
+            f"after {state['finished'] - state['started']:.0f} s"
+        )
+
+    st.markdown("### 🧭 Stages")
+    for step, name in enumerate(JOB_STAGES, start=1):
+        if step < state['step'] or (step == state['step'] and state['status'] == 'succeeded'):
+            icon = "✅"
+        elif step == state['step']:
+            icon = "⏳" if running else "⛔"
+        else:
+            icon = "⬜"
+        st.write(f"{icon} {step}. {name}")
+
+    display_metrics(state['metrics'])
+
+    with st.expander("📜 Training log"):
+        st.code(runner.read_log() or "(no output yet)", language=None)
+
+
+def main():
+    """
+    Retrain page.
+    """
+    st.title("🔁 Retrain Model")
+    st.markdown(
+        f"""
+        Retrain the classifier on `sms_spam_no_header.csv`, for example after a label review.
+        Training runs in the background, and the app keeps classifying with the current
+        model. The new model replaces it only if its test accuracy is at least
+        {MIN_ACCURACY:.0%} and no more than {MAX_ACCURACY_DROP:.0%} below the current model.
+        """
+    )
+
+    runner = load_runner()
+    running = runner.is_running()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("▶️ Start retraining", type="primary", disabled=running, use_container_width=True):
+            try:
+                runner.start()
+            except RuntimeError as e:
+                st.warning(f"⚠️ {e}")
+            st.rerun()
+    with col2:
+        if st.button("⏹️ Cancel", disabled=not running, use_container_width=True):
+            runner.cancel()
+            st.rerun()
+
+    st.markdown("---")
+
+    # Only this section reruns while a job is active, once per second
+    @st.fragment(run_every=1 if running else None)
+    def job_progress():
+        display_job(runner)
+        if running and runner.state()['status'] in FINAL_STATUSES:
+            # Refresh the whole page so the buttons reflect the finished job
+            st.rerun()
+
+    job_progress()
+
+
+main()
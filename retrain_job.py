@@ -0,0 +1,507 @@
+"""
+SMS Spam Classifier - Background Retraining Job
+
+Runs the train.py pipeline in a separate process, so the web app stays
+responsive while a model trains, and swaps the new model in only after it has
+been validated.
+
+A job runs the train.py stages, writing every output to a staging directory
+instead of the live files. It then validates the candidate and finally moves
+the staged files over the live ones, model last. Serving processes pick up
+the new model on their next request (ModelManager reloads a model whose file
+changed). The current model therefore keeps serving for the whole run, and a
+rejected, failed or cancelled job leaves it untouched.
+
+The renames are atomic one by one, not as a group: between the first and
+the last, the new companion files sit next to the old model. The similarity
+index carries a fingerprint of its model's vocabulary and refuses queries
+from the old model in that window, and a drift monitor is rebuilt with the
+current reference whenever its model is reloaded.
+
+The job reports progress by appending JSON events to 'retrain_events.jsonl':
+stage changes, metrics from train.evaluate_model as soon as each is computed,
+and the final outcome. Any app session or process can read the job state from
+that file; the training output goes to 'retrain.log'.
+
+Only one job runs at a time: 'retrain.lock' holds the job's process id, and a
+lock whose process has died is treated as stale. Cancellation is cooperative:
+SIGTERM makes the job stop at the next stage boundary. The job process starts
+with SIGTERM blocked and unblocks it once its handler is installed, so a
+cancel sent while the interpreter is still starting up and importing this
+module and its dependencies (scikit-learn, train.py) is delivered then
+instead of being lost or killing it. A job that has not stopped within CANCEL_GRACE_SECONDS is
+killed, unless it is already swapping files in: the job and the runner both
+try to create 'retrain.lock.outcome' exclusively, the job before the swap and
+the runner before the kill, and only the one that creates it goes ahead.
+
+Usage:
+    python retrain_job.py   # run one job in the foreground and print its progress (Ctrl+C cancels)
+"""
+
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score
+
+import train
+from explorer import PREDICTIONS_PATH
+from similarity import index_path_for
+from drift_monitor import reference_path_for
+
+
+DATASET_PATH = 'sms_spam_no_header.csv'
+MODEL_PATH = 'spam_model.joblib'
+STAGING_DIR = 'retrain_staging'
+EVENTS_PATH = 'retrain_events.jsonl'
+LOG_PATH = 'retrain.log'
+LOCK_PATH = 'retrain.lock'
+
+OUTCOME_SUFFIX = '.outcome'
+CANCEL_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+VALIDATION_STAGE = 'Validating new model'
+SWAP_STAGE = 'Swapping in new model'
+JOB_STAGES = train.PIPELINE_STAGES + [VALIDATION_STAGE, SWAP_STAGE]
+
+# A candidate is rejected below this test accuracy, or if it is more than
+# MAX_ACCURACY_DROP below the current model on the same test split
+MIN_ACCURACY = 0.90
+MAX_ACCURACY_DROP = 0.01
+
+CANCEL_GRACE_SECONDS = 10
+
+FINAL_STATUSES = ('succeeded', 'rejected', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised inside the job when cancellation was requested."""
+
+
+def append_event(event_type, path=EVENTS_PATH, **data):
+    """
+    Append one event to the job's event file.
+
+    Args:
+        event_type (str): 'started', 'stage', 'metric', 'cancel_requested' or 'finished'
+        path (str): Event file
+        **data: Event fields
+    """
+    event = {'type': event_type, 'time': time.time(), **data}
+    with open(path, 'a') as f:
+        f.write(json.dumps(event) + '\n')
+        f.flush()
+
+
+def read_job_state(path=EVENTS_PATH):
+    """
+    Fold the job's events into its current state.
+
+    Args:
+        path (str): Event file
+
+    Returns:
+        dict: 'status' ('idle', 'running' or one of FINAL_STATUSES), 'pid',
+            'step' (1-based index into JOB_STAGES, 0 before the first stage),
+            'stage', 'metrics', 'message', 'started', 'finished' and
+            'cancel_requested' (time or None)
+    """
+    state = {
+        'status': 'idle', 'pid': None, 'step': 0, 'stage': None, 'metrics': {},
+        'message': None, 'started': None, 'finished': None, 'cancel_requested': None,
+    }
+    if not os.path.exists(path):
+        return state
+
+    with open(path) as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # line still being written
+            kind = event['type']
+            if kind == 'started':
+                state.update(status='running', pid=event['pid'], started=event['time'])
+            elif kind == 'stage':
+                state.update(step=JOB_STAGES.index(event['name']) + 1, stage=event['name'])
+            elif kind == 'metric':
+                state['metrics'][event['name']] = event['value']
+            elif kind == 'cancel_requested' and state['cancel_requested'] is None:
+                state['cancel_requested'] = event['time']
+            elif kind == 'finished':
+                state.update(status=event['status'], message=event['message'], finished=event['time'])
+    return state
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lock_owner(lock_path=LOCK_PATH):
+    """Process id in the lock file, or None if there is no live owner."""
+    try:
+        with open(lock_path) as f:
+            pid = int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return None
+    return pid if pid and _process_alive(pid) else None
+
+
+def _acquire_lock(lock_path=LOCK_PATH):
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if _lock_owner(lock_path) is not None:
+                return False
+            # Stale lock left by a job that died
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+
+def _write_lock(pid, lock_path=LOCK_PATH):
+    with open(lock_path, 'w') as f:
+        f.write(str(pid))
+
+
+def _claim_outcome(outcome, lock_path=LOCK_PATH):
+    """
+    Decide between swapping and killing; the first caller wins.
+
+    Args:
+        outcome (str): 'swap' (the job) or 'kill' (the runner)
+        lock_path (str): Lock file of the job; the claim is stored next to it
+
+    Returns:
+        bool: True if this caller made the decision
+    """
+    try:
+        fd = os.open(lock_path + OUTCOME_SUFFIX, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w') as f:
+        f.write(outcome)
+    return True
+
+
+def _release_lock(pid, lock_path=LOCK_PATH):
+    try:
+        with open(lock_path) as f:
+            owner = int(f.read().strip() or 0)
+        if owner == pid:
+            os.remove(lock_path)
+    except (OSError, ValueError):
+        pass
+
+
+def staged_paths(staging_dir, model_path=MODEL_PATH, predictions_path=PREDICTIONS_PATH):
+    """
+    Pair every file a job writes in staging with the live file it replaces.
+
+    Returns:
+        list: (staged_path, live_path) tuples in swap order, model last
+    """
+    staged_model = os.path.join(staging_dir, os.path.basename(model_path))
+    return [
+        (os.path.join(staging_dir, os.path.basename(predictions_path)), predictions_path),
+        (reference_path_for(staged_model), reference_path_for(model_path)),
+        (index_path_for(staged_model), index_path_for(model_path)),
+        (staged_model, model_path),
+    ]
+
+
+def validate_candidate(result, staged_model_path, model_path=MODEL_PATH):
+    """
+    Decide whether a newly trained model may replace the current one.
+
+    The saved file is reloaded and must reproduce the in-memory model's
+    predictions. Its test accuracy must reach MIN_ACCURACY and must not fall
+    more than MAX_ACCURACY_DROP below the current model on the same test split.
+
+    Args:
+        result (dict): Return value of train.run_pipeline
+        staged_model_path (str): Where the candidate was saved
+        model_path (str): The live model it would replace
+
+    Returns:
+        tuple: (accepted, message, current_accuracy or None)
+    """
+    X_test, y_test = result['X_test'], result['y_test']
+    accuracy = result['metrics']['accuracy']
+
+    saved = joblib.load(staged_model_path)
+    sample = X_test[:200]
+    if not np.allclose(saved.predict_proba(sample), result['model'].predict_proba(sample)):
+        return False, "Saved model file does not reproduce the trained model", None
+
+    if accuracy < MIN_ACCURACY:
+        return False, f"Test accuracy {accuracy:.2%} is below the minimum of {MIN_ACCURACY:.0%}", None
+
+    if not os.path.exists(model_path):
+        return True, f"Test accuracy {accuracy:.2%} (no current model to compare with)", None
+
+    current_accuracy = float(accuracy_score(y_test, joblib.load(model_path).predict(X_test)))
+    if accuracy < current_accuracy - MAX_ACCURACY_DROP:
+        return False, (
+            f"Test accuracy {accuracy:.2%} is more than {MAX_ACCURACY_DROP:.0%} "
+            f"below the current model's {current_accuracy:.2%}"
+        ), current_accuracy
+    return True, f"Test accuracy {accuracy:.2%} vs {current_accuracy:.2%} for the current model", current_accuracy
+
+
+def run_job(dataset_path=DATASET_PATH, model_path=MODEL_PATH, staging_dir=STAGING_DIR,
+            events_path=EVENTS_PATH, lock_path=LOCK_PATH):
+    """
+    Train, validate and swap in a new model. Runs inside the job process,
+    which JobRunner.start launches with the cancel signals blocked.
+
+    Returns:
+        int: 0 if the new model was swapped in, 1 otherwise
+    """
+    cancel_requested = []
+    swapping = []
+
+    def request_cancel(signum, frame):
+        cancel_requested.append(signum)
+
+    for signum in CANCEL_SIGNALS:
+        signal.signal(signum, request_cancel)
+    # A cancel sent at any point since the process was launched, including
+    # while the module-level imports ran, is delivered here
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, CANCEL_SIGNALS)
+
+    def progress(kind, **data):
+        # Cancellation takes effect at the next event, but never once files are being swapped
+        if cancel_requested and not swapping:
+            raise JobCancelled()
+        append_event(kind, events_path, **data)
+
+    status, message = 'failed', None
+    try:
+        os.makedirs(staging_dir, exist_ok=True)
+        paths = staged_paths(staging_dir, model_path)
+        staged_model = paths[-1][0]
+
+        result = train.run_pipeline(dataset_path, staged_model, paths[0][0], progress)
+
+        progress('stage', name=VALIDATION_STAGE)
+        accepted, message, current_accuracy = validate_candidate(result, staged_model, model_path)
+        if current_accuracy is not None:
+            progress('metric', name='current_accuracy', value=current_accuracy)
+        if not accepted:
+            status = 'rejected'
+            return 1
+
+        # Last cancellation point: once the swap is claimed it always completes
+        progress('stage', name=SWAP_STAGE)
+        if not _claim_outcome('swap', lock_path):
+            raise JobCancelled()  # the runner is killing this job
+        swapping.append(True)
+        for staged, live in paths:
+            os.replace(staged, live)
+        status = 'succeeded'
+        return 0
+    except JobCancelled:
+        status, message = 'cancelled', "Cancelled before the new model was swapped in"
+        return 1
+    except Exception as e:
+        status, message = 'failed', f"{type(e).__name__}: {e}"
+        return 1
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        append_event('finished', events_path, status=status, message=message)
+        _release_lock(os.getpid(), lock_path)
+
+
+class JobRunner:
+    """
+    Starts, watches and cancels the background retraining job.
+
+    All state lives in the event and lock files, so any app session, or a
+    restarted app, sees the same job.
+
+    Args:
+        dataset_path (str): Dataset the job trains on
+        model_path (str): Live model the job replaces
+    """
+
+    def __init__(self, dataset_path=DATASET_PATH, model_path=MODEL_PATH, staging_dir=STAGING_DIR,
+                 events_path=EVENTS_PATH, log_path=LOG_PATH, lock_path=LOCK_PATH):
+        self.dataset_path = dataset_path
+        self.model_path = model_path
+        self.staging_dir = staging_dir
+        self.events_path = events_path
+        self.log_path = log_path
+        self.lock_path = lock_path
+        self._process = None
+
+    def state(self):
+        """
+        Current job state, see read_job_state.
+
+        Also notices a job process that died without reporting and enforces
+        the cancellation grace period.
+
+        Returns:
+            dict: Job state
+        """
+        if self._process is not None and self._process.poll() is not None:
+            self._process = None  # reaped; the exit code is reflected by the events
+        state = read_job_state(self.events_path)
+        if state['status'] != 'running':
+            return state
+
+        pid = state['pid']
+        if not _process_alive(pid):
+            append_event('finished', self.events_path, status='failed',
+                         message=f"Training process exited unexpectedly (see '{self.log_path}')")
+            _release_lock(pid, self.lock_path)
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            return read_job_state(self.events_path)
+
+        overdue = (
+            state['cancel_requested'] is not None
+            and time.time() - state['cancel_requested'] > CANCEL_GRACE_SECONDS
+        )
+        # Once the job has claimed the swap it is left to finish
+        if overdue and _claim_outcome('kill', self.lock_path):
+            os.kill(pid, signal.SIGKILL)
+            append_event('finished', self.events_path, status='cancelled',
+                         message=f"Stopped after not responding for {CANCEL_GRACE_SECONDS} s")
+            _release_lock(pid, self.lock_path)
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            return read_job_state(self.events_path)
+        return state
+
+    def is_running(self):
+        """
+        Returns:
+            bool: True while a job is running
+        """
+        return self.state()['status'] == 'running' or _lock_owner(self.lock_path) is not None
+
+    def start(self):
+        """
+        Launch a retraining job in a new process.
+
+        Raises:
+            RuntimeError: If a job is already running
+        """
+        if self.is_running() or not _acquire_lock(self.lock_path):
+            raise RuntimeError("A training job is already running")
+
+        try:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            if os.path.exists(self.lock_path + OUTCOME_SUFFIX):
+                os.remove(self.lock_path + OUTCOME_SUFFIX)
+            open(self.events_path, 'w').close()
+            # The child inherits the blocked signals and unblocks them once
+            # its cancel handler is installed
+            blocked = signal.pthread_sigmask(signal.SIG_BLOCK, CANCEL_SIGNALS)
+            try:
+                with open(self.log_path, 'w') as log:
+                    self._process = subprocess.Popen(
+                        [
+                            sys.executable, os.path.abspath(__file__), '--worker',
+                            self.dataset_path, self.model_path, self.staging_dir,
+                            self.events_path, self.lock_path,
+                        ],
+                        stdout=log,
+                        stderr=subprocess.STDOUT,
+                        start_new_session=True,
+                    )
+            finally:
+                signal.pthread_sigmask(signal.SIG_SETMASK, blocked)
+            _write_lock(self._process.pid, self.lock_path)
+            append_event('started', self.events_path, pid=self._process.pid)
+        except Exception:
+            _release_lock(os.getpid(), self.lock_path)
+            raise
+
+    def cancel(self):
+        """
+        Ask the running job to stop at its next stage boundary.
+
+        start() records the job as running as soon as its process exists, so
+        a job can be cancelled while it is still starting up.
+
+        Returns:
+            bool: True if a running job was signalled
+        """
+        state = self.state()
+        if state['status'] != 'running':
+            return False
+        try:
+            os.kill(state['pid'], signal.SIGTERM)
+        except ProcessLookupError:
+            return False
+        append_event('cancel_requested', self.events_path)
+        return True
+
+    def read_log(self, max_lines=200):
+        """
+        Returns:
+            str: Last lines of the training output
+        """
+        if not os.path.exists(self.log_path):
+            return ""
+        with open(self.log_path) as f:
+            return ''.join(f.readlines()[-max_lines:])
+
+
+def main():
+    """
+    Run one job and print its progress until it finishes.
+    """
+    if sys.argv[1:2] == ['--worker']:
+        return run_job(*sys.argv[2:])
+
+    runner = JobRunner()
+    try:
+        runner.start()
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    print("Retraining in the background (Ctrl+C cancels)...")
+    reported_step, reported_metrics = 0, set()
+    while True:
+        try:
+            state = runner.state()
+            while reported_step < state['step']:
+                reported_step += 1
+                print(f"[{reported_step}/{len(JOB_STAGES)}] {JOB_STAGES[reported_step - 1]}")
+            for name, value in state['metrics'].items():
+                if name not in reported_metrics:
+                    reported_metrics.add(name)
+                    print(f"  - {name}: {value}")
+            if state['status'] in FINAL_STATUSES:
+                print(f"Job {state['status']}: {state['message']}")
+                return 0 if state['status'] == 'succeeded' else 1
+            time.sleep(0.2)
+        except KeyboardInterrupt:
+            print("Cancelling...")
+            runner.cancel()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+SMS Spam Classifier - Batch Scoring
+
+Vectorized scoring helpers shared by the web app, the parity suite and the
+command-line tools. A whole batch of messages is scored with a single
+``predict_proba`` call, so the TF-IDF transform runs once per batch instead of
+once for ``predict`` and again for ``predict_proba``.
+
+Usage:
+    from scoring import score_messages
+    labels, spam_probabilities = score_messages(model, messages)
+"""
+
+import numpy as np
+
+
+def spam_class_index(model):
+    """
+    Find the column of ``predict_proba`` that holds the spam probability.
+
+    Args:
+        model: Trained classifier pipeline
+
+    Returns:
+        int: Index of the 'spam' class in ``model.classes_``
+
+    Raises:
+        ValueError: If the model was not trained with a 'spam' class
+    """
+    classes = list(model.classes_)
+    if 'spam' not in classes:
+        raise ValueError(f"Model classes {classes} do not include 'spam'")
+    return classes.index('spam')
+
+
+def score_messages(model, messages, monitor=None):
+    """
+    Score a batch of messages with one vectorized call into the pipeline.
+
+    Args:
+        model: Trained classifier pipeline
+        messages: Iterable of SMS message strings
+        monitor: Optional drift_monitor.DriftMonitor fed with the results
+
+    Returns:
+        tuple: (labels, spam_probabilities)
+            - labels (numpy.ndarray): Predicted class label per message
+            - spam_probabilities (numpy.ndarray): Probability of spam (0-1)
+    """
+    messages = list(messages)
+    if not messages:
+        return np.array([], dtype=object), np.array([], dtype=float)
+
+    probabilities = model.predict_proba(messages)
+    labels = model.classes_[probabilities.argmax(axis=1)]
+    spam_probabilities = probabilities[:, spam_class_index(model)]
+
+    if monitor is not None:
+        monitor.observe(messages, labels, spam_probabilities)
+
+    return labels, spam_probabilities
@@ -0,0 +1,319 @@
+"""
+SMS Spam Classifier - Similar Message Lookup
+
+Finds the labeled training messages closest to a new message, so analysts can
+see which known examples a prediction resembles.
+
+train.py vectorizes the training corpus once with the model's own
+normalization and TF-IDF steps, L2-normalizes the rows and saves the matrix
+next to the model ('spam_model.joblib' -> 'spam_model_neighbors.joblib').
+Because every row has unit length, the cosine similarity of a query with all
+training messages is a single sparse matrix-vector product.
+
+The matrix is stored term-major (one row per vocabulary term listing the
+messages that contain it). An SMS has only a handful of distinct terms, so
+the product only reads the postings of those terms instead of scanning the
+whole corpus. The k best scores are then picked with a partial sort
+(``numpy.argpartition``) over the messages that share at least one term.
+
+The index also stores a fingerprint of the model's vocabulary and IDF
+weights, and refuses queries from any other model. A retraining job swaps
+the index in just before the model, so for a moment the live index can be
+newer than the loaded model; without the check such a query would fail on
+the vocabulary size or, worse, return unrelated neighbors.
+
+Usage:
+    python similarity.py   # query latency on the training corpus and a 1M-message corpus
+"""
+
+import hashlib
+import os
+import sys
+import time
+import weakref
+
+import joblib
+import numpy as np
+import scipy.sparse
+from sklearn.preprocessing import normalize
+
+
+DEFAULT_TOP_K = 5
+
+_fingerprints = weakref.WeakKeyDictionary()
+
+
+def index_path_for(model_path):
+    """
+    Path of the similarity index that belongs to a model file.
+
+    Args:
+        model_path (str): Path of the '.joblib' model
+
+    Returns:
+        str: e.g. 'spam_model.joblib' -> 'spam_model_neighbors.joblib'
+    """
+    return os.path.splitext(model_path)[0] + '_neighbors.joblib'
+
+
+def vocabulary_fingerprint(model):
+    """
+    Hash of the model's TF-IDF vocabulary and IDF weights.
+
+    Two models share a fingerprint only if they map text to the same vectors.
+    The hash is computed once per model object.
+
+    Args:
+        model: Trained pipeline with a 'tfidf' step
+
+    Returns:
+        str: Hex digest
+    """
+    fingerprint = _fingerprints.get(model)
+    if fingerprint is None:
+        tfidf = model.named_steps['tfidf']
+        digest = hashlib.sha256()
+        digest.update('\n'.join(tfidf.get_feature_names_out()).encode('utf-8'))
+        digest.update(np.asarray(tfidf.idf_, dtype=np.float64).tobytes())
+        fingerprint = _fingerprints[model] = digest.hexdigest()
+    return fingerprint
+
+
+def vectorize(model, messages):
+    """
+    Turn messages into L2-normalized TF-IDF rows using the model's own steps.
+
+    Args:
+        model: Trained pipeline with a 'tfidf' step
+        messages: Iterable of message strings
+
+    Returns:
+        scipy.sparse.csr_matrix: One float32 row per message
+    """
+    names = [name for name, _ in model.steps]
+    features = list(messages)
+    # Steps are called directly: slicing the pipeline would re-check
+    # fitted state on stateless steps such as the text normalizer.
+    for _, step in model.steps[:names.index('tfidf') + 1]:
+        features = step.transform(features)
+    return normalize(features.astype(np.float32), norm='l2', copy=False)
+
+
+class SimilarityIndex:
+    """
+    Cosine-similarity index over a labeled message corpus.
+
+    Args:
+        term_matrix (scipy.sparse.csr_matrix): L2-normalized TF-IDF matrix,
+            transposed to one row per term (terms x messages)
+        texts (numpy.ndarray): Original message text per corpus row
+        labels (numpy.ndarray): Label per corpus row
+        fingerprint (str): vocabulary_fingerprint of the model the index was
+            built with, or None to only check the vocabulary size
+    """
+
+    def __init__(self, term_matrix, texts, labels, fingerprint=None):
+        self.term_matrix = term_matrix
+        self.texts = texts
+        self.labels = labels
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, model, messages, labels):
+        """
+        Vectorize a labeled corpus with the model.
+
+        Args:
+            model: Trained pipeline with a 'tfidf' step
+            messages: Corpus message strings
+            labels: Corpus labels, aligned with messages
+
+        Returns:
+            SimilarityIndex: Index ready to query or save
+        """
+        messages = list(messages)
+        matrix = vectorize(model, messages)
+        return cls(
+            matrix.T.tocsr(),
+            np.asarray(messages, dtype=object),
+            np.asarray(labels, dtype=object),
+            vocabulary_fingerprint(model),
+        )
+
+    def __len__(self):
+        return self.term_matrix.shape[1]
+
+    def save(self, path):
+        """
+        Write the index to disk atomically.
+
+        Args:
+            path (str): Destination '.joblib' file
+        """
+        tmp_path = path + '.tmp'
+        joblib.dump(
+            {
+                'term_matrix': self.term_matrix,
+                'texts': self.texts,
+                'labels': self.labels,
+                'fingerprint': self.fingerprint,
+            },
+            tmp_path,
+        )
+        os.replace(tmp_path, path)
+
+    def top_k_rows(self, query, k=DEFAULT_TOP_K):
+        """
+        Find the corpus rows most similar to one vectorized query.
+
+        Args:
+            query (scipy.sparse.csr_matrix): 1 x vocabulary L2-normalized row
+            k (int): Number of neighbors to return
+
+        Returns:
+            tuple: (rows, similarities) best first; messages sharing no
+                term with the query are never returned
+        """
+        scores = query @ self.term_matrix
+        rows, similarities = scores.indices, scores.data
+        if len(similarities) > k:
+            best = np.argpartition(similarities, -k)[-k:]
+            rows, similarities = rows[best], similarities[best]
+        order = np.argsort(-similarities, kind='stable')
+        return rows[order], similarities[order]
+
+    def query(self, model, message, k=DEFAULT_TOP_K):
+        """
+        Find the labeled corpus messages most similar to a message.
+
+        Args:
+            model: The pipeline the index was built with
+            message (str): Message to look up
+            k (int): Number of neighbors to return
+
+        Returns:
+            list: Dicts with 'similarity' (0-1), 'label' and 'text', best first
+
+        Raises:
+            ValueError: If the index was built with a different model
+        """
+        if self.fingerprint is not None and self.fingerprint != vocabulary_fingerprint(model):
+            raise ValueError(
+                "Index was built with a different model vocabulary; it is either being "
+                "swapped in with a retrained model or needs to be rebuilt with train.py"
+            )
+        query = vectorize(model, [message])
+        if query.shape[1] != self.term_matrix.shape[0]:
+            raise ValueError(
+                f"Index vocabulary size {self.term_matrix.shape[0]} does not match "
+                f"model vocabulary size {query.shape[1]}; rebuild it with train.py"
+            )
+        rows, similarities = self.top_k_rows(query, k)
+        return [
+            {'similarity': float(similarity), 'label': self.labels[row], 'text': self.texts[row]}
+            for row, similarity in zip(rows, similarities)
+        ]
+
+
+def build_index(model, messages, labels, path):
+    """
+    Build the similarity index for a corpus and save it.
+
+    Args:
+        model: Trained pipeline with a 'tfidf' step
+        messages: Corpus message strings
+        labels: Corpus labels
+        path (str): Destination file, usually index_path_for(model_path)
+
+    Returns:
+        SimilarityIndex: The saved index
+    """
+    index = SimilarityIndex.build(model, messages, labels)
+    index.save(path)
+    return index
+
+
+def load_index(path):
+    """
+    Load a saved similarity index.
+
+    Args:
+        path (str): Index file written by build_index
+
+    Returns:
+        SimilarityIndex: The index, or None if the file does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    data = joblib.load(path)
+    return SimilarityIndex(data['term_matrix'], data['texts'], data['labels'], data.get('fingerprint'))
+
+
+def benchmark(model_path='spam_model.joblib', file_path='sms_spam_no_header.csv',
+              corpus_size=1_000_000, queries=500, k=DEFAULT_TOP_K):
+    """
+    Print end-to-end query latency on the saved index and on a large synthetic corpus.
+
+    Every timing covers a full query() from the raw message: normalization,
+    TF-IDF vectorization, the sparse product and the top-k selection. The
+    vectorization row shows how much of that is spent before the index is
+    touched. The large corpus repeats the saved rows until it reaches
+    corpus_size, which keeps a realistic term distribution (and realistic
+    posting list lengths).
+    """
+    import pandas as pd
+
+    model = joblib.load(model_path)
+    index = load_index(index_path_for(model_path))
+    if index is None:
+        print("No similarity index found - run 'python train.py' first.")
+        return 1
+    messages = pd.read_csv(file_path, header=None, names=['label', 'text'])['text'].tolist()
+    rng = np.random.default_rng(0)
+    sample = [messages[i] for i in rng.choice(len(messages), size=queries)]
+    index.query(model, sample[0], k)
+
+    doc_matrix = index.term_matrix.T.tocsr()
+    repeats = -(-corpus_size // doc_matrix.shape[0])
+    large_docs = scipy.sparse.vstack([doc_matrix] * repeats, format='csr')[:corpus_size]
+    large = SimilarityIndex(
+        large_docs.T.tocsr(),
+        np.tile(index.texts, repeats)[:corpus_size],
+        np.tile(index.labels, repeats)[:corpus_size],
+        index.fingerprint,
+    )
+
+    def latency_ms(func):
+        timings = []
+        for message in sample:
+            start = time.perf_counter()
+            func(message)
+            timings.append(time.perf_counter() - start)
+        return np.percentile(timings, [50, 95, 99]) * 1000
+
+    def scan(message):
+        # Same product over the message-major matrix: scans every message
+        query = vectorize(model, [message])
+        return np.argpartition((large_docs @ query.T).toarray().ravel(), -k)[-k:]
+
+    print("=" * 72)
+    print(f"SIMILAR MESSAGE LOOKUP, END TO END (top {k}, {queries} queries)")
+    print("=" * 72)
+    print(f"{'Corpus':<34}{'Messages':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    print("-" * 72)
+    rows = [
+        ('Vectorization only', 0, lambda m: vectorize(model, [m])),
+        ('Training index', len(index), lambda m: index.query(model, m, k)),
+        ('Synthetic, term-major', len(large), lambda m: large.query(model, m, k)),
+        ('Synthetic, message-major scan', len(large), scan),
+    ]
+    for name, size, func in rows:
+        p50, p95, p99 = latency_ms(func)
+        size_text = f"{size:,}" if size else "-"
+        print(f"{name:<34}{size_text:>10}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}")
+    print("=" * 72)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark())
@@ -0,0 +1,445 @@
+"""
+SMS Spam Classifier - Streaming Mode
+
+Reads a live feed of messages, one JSON object per line, from stdin or by
+tailing a growing file, and writes one JSON verdict per line downstream.
+
+Arriving messages are grouped into micro-batches. A batch is flushed as soon
+as it holds --batch-size messages or its oldest message has waited
+--max-delay-ms, and is scored with a single vectorized call into the loaded
+pipeline. Larger batches raise sustained throughput; a shorter delay bounds
+the latency added by batching.
+
+Backpressure: the reader hands lines to the scorer through a bounded queue.
+When scoring or the downstream consumer falls behind, the queue fills, the
+reader stops reading, and the upstream pipe blocks instead of memory growing.
+
+Input line:   {"id": "abc", "message": "WINNER!! Call now"}
+Output line:  {"id": "abc", "message": "...", "prediction": "spam",
+               "spam_probability": 0.993, "latency_ms": 4.1}
+
+Lines that are not valid JSON or lack the message field produce an output
+line with an "error" field instead of a prediction.
+
+With --key-field, each message is routed to the named model from --model-dir
+selected by that field (see model_manager.py); a batch is scored with one call
+per model key it contains.
+
+Usage:
+    cat feed.jsonl | python stream_classify.py
+    python stream_classify.py --follow /var/log/sms/feed.jsonl --batch-size 256
+    python stream_classify.py --max-delay-ms 5 --output verdicts.jsonl < feed.jsonl
+    python stream_classify.py --model-dir models --key-field carrier < feed.jsonl
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from model_manager import DEFAULT_MODEL_KEY, MODEL_DIR, ModelManager
+
+
+# Marks the end of the input stream in the queue
+_EOF = object()
+
+
+def read_stdin(lines, stop, stream=None):
+    """
+    Feed lines from stdin into the queue until EOF.
+
+    Args:
+        lines (queue.Queue): Bounded queue of (arrival time, line)
+        stop (threading.Event): Set to end reading early
+        stream: Text stream to read (default: sys.stdin)
+    """
+    stream = stream or sys.stdin
+    try:
+        for line in stream:
+            if stop.is_set():
+                break
+            lines.put((time.perf_counter(), line))
+    finally:
+        lines.put(_EOF)
+
+
+def follow_file(path, lines, stop, from_start=False, poll_interval=0.05):
+    """
+    Tail a growing file and feed complete lines into the queue.
+
+    Partial lines are held back until their newline arrives. If the file
+    shrinks (truncated in place), reading restarts from the top. If it is
+    replaced (rotated by rename and recreate) or deleted, the old file is
+    read to its end, then the path is reopened from the top as soon as it
+    exists again. The end marker is always queued when reading stops, also
+    on an unexpected error, so the scorer never waits forever.
+
+    Args:
+        path (str): File to follow
+        lines (queue.Queue): Bounded queue of (arrival time, line)
+        stop (threading.Event): Set to stop following
+        from_start (bool): Read existing content first instead of only new lines
+        poll_interval (float): Seconds to sleep when no new data is available
+    """
+    f = None
+    partial = ''
+    # Only content present when following starts is skipped; a file that
+    # appears later is new in full
+    skip_existing = not from_start
+    try:
+        while not stop.is_set():
+            if f is None:
+                try:
+                    f = open(path, 'r', encoding='utf-8')
+                except OSError:
+                    skip_existing = False
+                    time.sleep(poll_interval)  # not there (yet), e.g. mid-rotation
+                    continue
+                if skip_existing:
+                    f.seek(0, os.SEEK_END)
+                    skip_existing = False
+                partial = ''
+
+            chunk = f.readline()
+            if chunk:
+                partial += chunk
+                if partial.endswith('\n'):
+                    lines.put((time.perf_counter(), partial))
+                    partial = ''
+                continue
+
+            # At the end of the open file: has the path been replaced or truncated?
+            try:
+                current = os.stat(path)
+            except OSError:
+                current = None
+            opened = os.fstat(f.fileno())
+            if current is None or (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev):
+                f.close()
+                f = None
+                continue
+            if current.st_size < f.tell():
+                f.seek(0)
+                partial = ''
+            time.sleep(poll_interval)
+    finally:
+        if f is not None:
+            f.close()
+        lines.put(_EOF)
+
+
+def collect_batch(lines, batch_size, max_delay, idle_timeout=None):
+    """
+    Take the next micro-batch from the queue.
+
+    Waits for a first line, then keeps collecting until the batch is full or
+    the first line has waited max_delay seconds.
+
+    Args:
+        lines (queue.Queue): Queue of (arrival time, line)
+        batch_size (int): Maximum number of lines per batch
+        max_delay (float): Maximum seconds the oldest line may wait
+        idle_timeout (float): Give up waiting for a first line after this many
+            seconds and return an empty batch (None waits forever)
+
+    Returns:
+        tuple: (batch, eof) where batch is a list of (arrival time, line)
+    """
+    try:
+        first = lines.get(timeout=idle_timeout)
+    except queue.Empty:
+        return [], False
+    if first is _EOF:
+        return [], True
+
+    batch = [first]
+    deadline = first[0] + max_delay
+    while len(batch) < batch_size:
+        remaining = deadline - time.perf_counter()
+        try:
+            item = lines.get(timeout=remaining) if remaining > 0 else lines.get_nowait()
+        except queue.Empty:
+            break
+        if item is _EOF:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+def parse_line(line, field):
+    """
+    Decode one input line.
+
+    Returns:
+        tuple: (record, error) where error is None for a valid record
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {'raw': line.rstrip('\n')}, f"invalid JSON: {e.msg}"
+    if not isinstance(record, dict):
+        return {'raw': record}, "expected a JSON object"
+    if not isinstance(record.get(field), str):
+        return record, f"missing string field '{field}'"
+    return record, None
+
+
+class StreamStats:
+    """
+    Running throughput and added-latency statistics.
+
+    Latencies of the current reporting window are kept for percentiles and
+    cleared on every report, so memory stays bounded on endless streams.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.messages = 0
+        self.errors = 0
+        self.batches = 0
+        self.max_latency = 0.0
+        self._window_started = self.started
+        self._window_messages = 0
+        self._window_latencies = []
+
+    def add_batch(self, latencies, errors):
+        self.batches += 1
+        self.messages += len(latencies)
+        self.errors += errors
+        self._window_messages += len(latencies)
+        self._window_latencies.extend(latencies)
+        if latencies:
+            self.max_latency = max(self.max_latency, max(latencies))
+
+    def window_report(self):
+        """
+        Summarize and reset the current reporting window.
+
+        Returns:
+            str: One status line
+        """
+        now = time.perf_counter()
+        elapsed = now - self._window_started
+        latencies_ms = np.array(self._window_latencies) * 1000
+        p50, p99, worst = (
+            np.percentile(latencies_ms, [50, 99, 100]) if len(latencies_ms) else (0.0, 0.0, 0.0)
+        )
+        line = (
+            f"[stream] {self._window_messages / elapsed:8.1f} msg/s | "
+            f"added latency p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {worst:.1f} ms | "
+            f"total {self.messages} msgs, {self.errors} errors"
+        )
+        self._window_started = now
+        self._window_messages = 0
+        self._window_latencies = []
+        return line
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'messages': self.messages,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch_size': self.messages / self.batches if self.batches else 0.0,
+            'throughput': self.messages / elapsed if elapsed > 0 else 0.0,
+            'max_latency_ms': self.max_latency * 1000,
+        }
+
+
+def score_records(manager, parsed, field, key_field=None):
+    """
+    Score the valid records of a batch in place, one call per model key.
+
+    Args:
+        manager (ModelManager): Source of the models
+        parsed (list): (record, error) pairs from parse_line; records that
+            cannot be scored get their error filled in
+        field (str): JSON field holding the message text
+        key_field (str): JSON field selecting the model, or None to use the
+            default model for every record
+    """
+    by_key = {}
+    for i, (record, error) in enumerate(parsed):
+        if error is None:
+            key = record.get(key_field, DEFAULT_MODEL_KEY) if key_field else DEFAULT_MODEL_KEY
+            if not isinstance(key, str):
+                parsed[i] = (record, f"field '{key_field}' must be a string")
+                continue
+            by_key.setdefault(key, []).append(i)
+
+    for key, indices in by_key.items():
+        try:
+            labels, spam_probabilities = manager.score(
+                key, [parsed[i][0][field] for i in indices]
+            )
+        except (KeyError, RuntimeError) as e:
+            error = f"unknown model '{key}'" if isinstance(e, KeyError) else str(e)
+            for i in indices:
+                parsed[i] = (parsed[i][0], error)
+            continue
+        for i, label, probability in zip(indices, labels, spam_probabilities):
+            parsed[i][0]['prediction'] = str(label)
+            parsed[i][0]['spam_probability'] = round(float(probability), 6)
+
+
+def run_stream(manager, lines, out, batch_size=128, max_delay=0.01, field='message',
+               key_field=None, report_interval=10.0, log=None):
+    """
+    Score micro-batches from the queue and write verdicts until EOF.
+
+    Args:
+        manager (ModelManager): Source of the models
+        lines (queue.Queue): Queue filled by read_stdin or follow_file
+        out: Writable text stream for verdict lines
+        batch_size (int): Flush a batch at this many messages
+        max_delay (float): Flush a batch once its oldest message waited this long
+        field (str): JSON field holding the message text
+        key_field (str): JSON field routing each message to a model key, or
+            None to score everything with the default model
+        report_interval (float): Seconds between status lines, 0 to disable
+        log: Stream for status lines (default: sys.stderr)
+
+    Returns:
+        dict: Final statistics from StreamStats.summary
+    """
+    log = log or sys.stderr
+    stats = StreamStats()
+    next_report = time.perf_counter() + report_interval
+
+    while True:
+        batch, eof = collect_batch(
+            lines, batch_size, max_delay, idle_timeout=report_interval or None
+        )
+
+        if batch:
+            parsed = [parse_line(line, field) for _, line in batch]
+            score_records(manager, parsed, field, key_field)
+
+            output = []
+            latencies = []
+            errors = 0
+            now = time.perf_counter()
+            for (arrival, _), (record, error) in zip(batch, parsed):
+                if error is not None:
+                    record['error'] = error
+                    errors += 1
+                latency = now - arrival
+                record['latency_ms'] = round(latency * 1000, 3)
+                latencies.append(latency)
+                output.append(json.dumps(record, ensure_ascii=False))
+
+            # A blocking write here is what pushes backpressure upstream
+            out.write('\n'.join(output) + '\n')
+            out.flush()
+            stats.add_batch(latencies, errors)
+
+        if report_interval and time.perf_counter() >= next_report:
+            print(stats.window_report(), file=log, flush=True)
+            for key, drift in manager.drift_reports().items():
+                if drift['score'] is not None:
+                    print(f"[stream] drift '{key}': {drift['score']:.3f} ({drift['status']}, "
+                          f"{drift['observations']} msgs)", file=log, flush=True)
+            next_report = time.perf_counter() + report_interval
+
+        if eof:
+            return stats.summary()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming SMS spam classifier (JSON lines in, JSON lines out)")
+    parser.add_argument('--follow', metavar='FILE', default=None,
+                        help="Tail FILE instead of reading stdin")
+    parser.add_argument('--from-start', action='store_true',
+                        help="With --follow, process existing lines before new ones")
+    parser.add_argument('--output', default=None,
+                        help="Write verdicts to this file instead of stdout")
+    parser.add_argument('--model', default='spam_model.joblib',
+                        help="Default model file (default: spam_model.joblib)")
+    parser.add_argument('--model-dir', default=MODEL_DIR,
+                        help="Directory of named '<key>.joblib' models (default: models)")
+    parser.add_argument('--key-field', default=None,
+                        help="JSON field selecting the model key per message (default: use the default model)")
+    parser.add_argument('--memory-budget-mb', type=float, default=256,
+                        help="Memory budget for resident models before LRU eviction (default: 256)")
+    parser.add_argument('--field', default='message',
+                        help="JSON field holding the message text (default: message)")
+    parser.add_argument('--batch-size', type=int, default=128,
+                        help="Flush a batch at this many messages (default: 128)")
+    parser.add_argument('--max-delay-ms', type=float, default=10.0,
+                        help="Flush a batch once its oldest message waited this long (default: 10)")
+    parser.add_argument('--queue-size', type=int, default=4096,
+                        help="Lines buffered before the reader blocks (default: 4096)")
+    parser.add_argument('--report-interval', type=float, default=10.0,
+                        help="Seconds between status lines on stderr, 0 to disable (default: 10)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the streaming classifier from the command line.
+    """
+    args = parse_args(argv)
+
+    manager = ModelManager(
+        args.model_dir, memory_budget_mb=args.memory_budget_mb, default_path=args.model
+    )
+    if not args.key_field:
+        try:
+            manager.get(DEFAULT_MODEL_KEY)
+        except KeyError:
+            print(f"ERROR: Model file '{args.model}' not found. Run 'python train.py' first.", file=sys.stderr)
+            return 1
+
+    lines = queue.Queue(maxsize=args.queue_size)
+    stop = threading.Event()
+    if args.follow:
+        reader = threading.Thread(
+            target=follow_file, args=(args.follow, lines, stop, args.from_start), daemon=True
+        )
+    else:
+        reader = threading.Thread(target=read_stdin, args=(lines, stop), daemon=True)
+    reader.start()
+
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    print(
+        f"[stream] {'models routed by ' + repr(args.key_field) if args.key_field else 'model ' + repr(args.model)}, "
+        f"batch size {args.batch_size}, "
+        f"max delay {args.max_delay_ms:g} ms, reading {args.follow or 'stdin'}",
+        file=sys.stderr, flush=True,
+    )
+
+    try:
+        summary = run_stream(
+            manager, lines, out,
+            batch_size=args.batch_size,
+            max_delay=args.max_delay_ms / 1000,
+            field=args.field,
+            key_field=args.key_field,
+            report_interval=args.report_interval,
+        )
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # Downstream consumer went away
+        return 0
+    finally:
+        stop.set()
+        if out is not sys.stdout:
+            out.close()
+
+    print(
+        f"[stream] done: {summary['messages']} messages in {summary['batches']} batches "
+        f"(mean {summary['mean_batch_size']:.1f}), {summary['throughput']:.1f} msg/s, "
+        f"max added latency {summary['max_latency_ms']:.1f} ms, {summary['errors']} errors",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Tests for the drift monitor
+
+Checks the PSI calculation against hand-computed values, the fixed-bin
+histograms, and the time windows of DriftMonitor using a fake clock.
+
+Usage:
+    python test_drift_monitor.py
+    python -m pytest test_drift_monitor.py
+"""
+
+import math
+import sys
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from drift_monitor import (
+    FEATURE_BINS,
+    MIN_OBSERVATIONS,
+    DriftMonitor,
+    DriftSketch,
+    _bin_counts,
+    population_stability_index,
+)
+
+
+WINDOW_SECONDS = 60
+MAX_WINDOWS = 3
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_model():
+    texts = ["win a free prize now", "claim your cash prize", "see you at lunch", "thanks for your help"]
+    labels = ['spam', 'spam', 'ham', 'ham']
+    return Pipeline([('tfidf', TfidfVectorizer()), ('classifier', MultinomialNB())]).fit(texts, labels)
+
+
+def make_monitor(reference=None):
+    clock = FakeClock()
+    monitor = DriftMonitor(make_model(), reference, window_seconds=WINDOW_SECONDS,
+                           max_windows=MAX_WINDOWS, clock=clock)
+    return monitor, clock
+
+
+def observe(monitor, n, spam_probability, message="see you at lunch"):
+    labels = np.array(['spam' if spam_probability >= 0.5 else 'ham'] * n)
+    monitor.observe([message] * n, labels, np.full(n, spam_probability))
+
+
+def test_psi_known_values():
+    """PSI matches the formula sum((q - p) * ln(q / p))."""
+    assert population_stability_index([10, 20, 30], [1, 2, 3]) == 0.0
+    expected = 0.4 * math.log(0.9 / 0.5) + (-0.4) * math.log(0.1 / 0.5)
+    assert math.isclose(population_stability_index([50, 50], [90, 10]), expected, rel_tol=1e-12)
+    # Symmetric in its arguments
+    assert math.isclose(population_stability_index([90, 10], [50, 50]), expected, rel_tol=1e-12)
+
+
+def test_psi_edge_cases():
+    """Empty histograms score 0; empty bins stay finite thanks to the floor."""
+    assert population_stability_index([0, 0], [5, 5]) == 0.0
+    assert population_stability_index([5, 5], [0, 0]) == 0.0
+    psi = population_stability_index([100, 0], [0, 100])
+    assert math.isfinite(psi) and psi > 1
+
+
+def test_bin_counts_cover_out_of_range_values():
+    """Values outside the edges land in the first or last bin."""
+    edges = FEATURE_BINS['spam_probability']
+    counts = _bin_counts(np.array([-0.5, 0.0, 0.07, 0.52, 1.0, 1.5]), edges)
+    assert counts.sum() == 6
+    assert counts[0] == 2 and counts[1] == 1 and counts[10] == 1 and counts[-1] == 2
+    assert _bin_counts(np.array([10_000.0]), FEATURE_BINS['length'])[-1] == 1
+
+
+def test_sketch_round_trip():
+    """Sketches survive to_dict/from_dict and add up."""
+    sketch = DriftSketch()
+    sketch.update(np.array([0.1, 0.9]), np.array([20.0, 150.0]), np.array([0.0]), np.array(['ham', 'spam']))
+    copy = DriftSketch.from_dict(sketch.to_dict())
+    assert copy.count == 2 and copy.spam_ratio == 0.5
+    total = copy.add(sketch)
+    assert total.count == 4
+    assert total.histograms['spam_probability'].sum() == 4
+
+
+def test_report_needs_reference_and_observations():
+    """Without a reference or with too few observations there is no score."""
+    monitor, _ = make_monitor()
+    observe(monitor, MIN_OBSERVATIONS, 0.1)
+    assert monitor.report()['status'] == 'no reference'
+
+    reference = DriftSketch()
+    reference.update(np.full(100, 0.1), np.full(100, 16.0), np.zeros(100), np.array(['ham'] * 100))
+    monitor, _ = make_monitor(reference)
+    observe(monitor, MIN_OBSERVATIONS - 1, 0.1)
+    report = monitor.report()
+    assert report['status'] == 'collecting' and report['score'] is None
+
+
+def test_report_detects_shift():
+    """Traffic like the reference is stable; shifted traffic is significant."""
+    reference = DriftSketch()
+    reference.update(np.full(200, 0.1), np.full(200, 16.0), np.zeros(200), np.array(['ham'] * 200))
+
+    monitor, _ = make_monitor(reference)
+    observe(monitor, 100, 0.1)
+    report = monitor.report()
+    assert report['status'] == 'stable' and report['score'] < 0.01
+
+    monitor, _ = make_monitor(reference)
+    observe(monitor, 100, 0.95, message="unknown words everywhere here")
+    report = monitor.report()
+    assert report['status'] == 'significant'
+    assert report['psi']['spam_probability'] > 1 and report['psi']['oov_rate'] > 1
+
+
+def test_windows_roll_over_and_cap():
+    """Each window gets its own sketch, and only the last max_windows are kept."""
+    monitor, clock = make_monitor()
+    for i in range(MAX_WINDOWS + 2):
+        observe(monitor, i + 1, 0.1)
+        clock.now += WINDOW_SECONDS
+    clock.now -= WINDOW_SECONDS
+    windows = monitor.spam_ratio_by_window()
+    assert [count for _, _, count in windows] == [3, 4, 5]
+    assert monitor.live_sketch().count == 12
+
+
+def test_stale_windows_expire_without_traffic():
+    """After a quiet period the live view drops old windows."""
+    monitor, clock = make_monitor()
+    observe(monitor, 10, 0.9)
+    clock.now += WINDOW_SECONDS
+    observe(monitor, 5, 0.1)
+    assert monitor.live_sketch().count == 15
+
+    # The first window ages out first, then the second
+    clock.now += (MAX_WINDOWS - 1) * WINDOW_SECONDS
+    assert monitor.live_sketch().count == 5
+    clock.now += WINDOW_SECONDS
+    assert monitor.live_sketch().count == 0
+    assert monitor.spam_ratio_by_window() == []
+    assert monitor.report()['observations'] == 0
+
+
+def main():
+    """
+    Run the tests and print a summary.
+    """
+    tests = [
+        test_psi_known_values,
+        test_psi_edge_cases,
+        test_bin_counts_cover_out_of_range_values,
+        test_sketch_round_trip,
+        test_report_needs_reference_and_observations,
+        test_report_detects_shift,
+        test_windows_roll_over_and_cap,
+        test_stale_windows_expire_without_traffic,
+    ]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"✗ {test.__name__}: {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
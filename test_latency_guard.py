@@ -0,0 +1,133 @@
+"""
+Tests for bounded-cost scoring
+
+Checks that windows split long messages on whitespace without losing words,
+that sampling and long-run cutting keep the scored text bounded, and that the
+batch path scores ordinary messages as before and spends one time budget per
+batch.
+
+Usage:
+    python test_latency_guard.py
+    python -m pytest test_latency_guard.py
+"""
+
+import sys
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from latency_guard import (
+    MAX_RUN_CHARS,
+    MAX_SEGMENTS,
+    SEGMENT_CHARS,
+    score_guarded,
+    score_guarded_batch,
+    segment_message,
+)
+from scoring import score_messages
+
+
+def make_model():
+    texts = ["win a free prize now", "claim your cash prize", "see you at lunch", "thanks for your help"]
+    labels = ['spam', 'spam', 'ham', 'ham']
+    return Pipeline([('tfidf', TfidfVectorizer()), ('classifier', MultinomialNB())]).fit(texts, labels)
+
+
+def test_windows_keep_every_token():
+    """A word crossing a window edge lands whole in exactly one window."""
+    text = 'x ' * 500 + 'abcdefghij ' + 'y ' * 9
+    assert text.index('abcdefghij') == SEGMENT_CHARS and len(text) == 1_029
+    segments, total = segment_message(text)
+    assert total == 2 and len(segments) == 2
+    assert ''.join(segments) == text
+    assert ' '.join(segments).split() == text.split()
+    assert sum('abcdefghij' in segment for segment in segments) == 1
+
+    words = ' '.join(f'word{i}' for i in range(700))
+    segments, total = segment_message(words)
+    assert len(segments) == total <= MAX_SEGMENTS
+    assert ''.join(segments) == words
+
+
+def test_windows_are_bounded():
+    """Long runs are cut and only MAX_SEGMENTS bounded windows are kept."""
+    segments, total = segment_message('a' * 1_000_000)
+    assert total == 1_000 and len(segments) == MAX_SEGMENTS
+    assert all(len(segment) <= MAX_RUN_CHARS for segment in segments)
+
+    text = ('prize ' * 100 + 'b' * 5_000 + ' ') * 50
+    segments, total = segment_message(text)
+    assert len(segments) == MAX_SEGMENTS < total
+    assert all(len(segment) <= SEGMENT_CHARS + MAX_RUN_CHARS for segment in segments)
+    assert max(len(run) for segment in segments for run in segment.split()) == MAX_RUN_CHARS
+
+    assert segment_message('') == ([''], 1)
+    assert segment_message('short message') == (['short message'], 1)
+
+
+def test_unsampled_message_is_scored_in_full():
+    """A message spanning a few windows reports every character as scored."""
+    text = 'x ' * 500 + 'abcdefghij ' + 'y ' * 9
+    report = score_guarded(make_model(), text)
+    assert report['segments_scored'] == report['segments_total'] == 2
+    assert report['chars_scored'] == report['chars_total']
+    assert not report['truncated']
+
+
+def test_batch_matches_regular_scoring():
+    """Ordinary messages score exactly as scoring.score_messages scores them."""
+    model = make_model()
+    messages = ["win a free prize now", "see you at lunch", "thanks"]
+    labels, spam_probabilities = score_guarded_batch(model, messages)
+    expected_labels, expected_probabilities = score_messages(model, messages)
+    assert list(labels) == list(expected_labels)
+    assert np.allclose(spam_probabilities, expected_probabilities)
+
+    labels, spam_probabilities = score_guarded_batch(model, [])
+    assert len(labels) == 0 and len(spam_probabilities) == 0
+
+
+def test_batch_budget_covers_the_whole_batch():
+    """With the budget spent, long records fall back to their first window."""
+    model = make_model()
+    long_message = 'see you at lunch ' * 1_000
+    batch = ["win a free prize now"] + [long_message] * 20
+
+    start = time.perf_counter()
+    labels, spam_probabilities = score_guarded_batch(model, batch, time_budget_ms=0)
+    assert (time.perf_counter() - start) < 1
+    assert labels[0] == 'spam' and all(label == 'ham' for label in labels[1:])
+    assert np.isfinite(spam_probabilities).all()
+
+    first_window = segment_message(long_message)[0][0]
+    _, head_probability = score_messages(model, [first_window])
+    assert np.allclose(spam_probabilities[1:], head_probability[0])
+
+
+def main():
+    """
+    Run the tests and print a summary.
+    """
+    tests = [
+        test_windows_keep_every_token,
+        test_windows_are_bounded,
+        test_unsampled_message_is_scored_in_full,
+        test_batch_matches_regular_scoring,
+        test_batch_budget_covers_the_whole_batch,
+    ]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"✗ {test.__name__}: {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
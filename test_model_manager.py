@@ -0,0 +1,174 @@
+"""
+Tests for the multi-model manager
+
+Uses tiny models in a temporary model directory and a memory budget that
+fits only two of them, to check LRU eviction, the single shared load for
+concurrent requests and reloading a model whose file was replaced.
+
+Usage:
+    python test_model_manager.py
+    python -m pytest test_model_manager.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import joblib
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+import model_manager
+from model_manager import ModelManager, estimate_model_bytes
+
+
+TRAINING = {
+    'spam': ["win a free prize now", "claim your cash prize", "free entry call now"],
+    'ham': ["see you at lunch", "running late for the meeting", "thanks for your help"],
+}
+
+
+def make_model(extra_word=''):
+    """Fit a tiny pipeline; extra_word changes the vocabulary between versions."""
+    texts = [text + ' ' + extra_word for texts in TRAINING.values() for text in texts]
+    labels = [label for label, texts in TRAINING.items() for _ in texts]
+    return Pipeline([('tfidf', TfidfVectorizer()), ('classifier', MultinomialNB())]).fit(texts, labels)
+
+
+def make_manager(model_dir, keys, models_in_budget=2):
+    """Write one model per key and return a manager whose budget fits models_in_budget of them."""
+    for key in keys:
+        joblib.dump(make_model(), os.path.join(model_dir, f'{key}.joblib'))
+    size_bytes = estimate_model_bytes(make_model())
+    budget_mb = (models_in_budget + 0.5) * size_bytes / (1024 * 1024)
+    return ModelManager(model_dir, memory_budget_mb=budget_mb, default_path='missing.joblib',
+                        monitor_drift=False)
+
+
+def test_lru_eviction():
+    """Loading past the budget evicts the least recently used model."""
+    with tempfile.TemporaryDirectory() as model_dir:
+        manager = make_manager(model_dir, ['a', 'b', 'c'])
+        manager.get('a')
+        manager.get('b')
+        manager.get('a')          # 'b' is now least recently used
+        manager.get('c')
+
+        stats = manager.stats().set_index('model')
+        assert stats.loc['a', 'resident'] and stats.loc['c', 'resident']
+        assert not stats.loc['b', 'resident']
+        assert stats.loc['b', 'evictions'] == 1
+        assert manager.resident_bytes() <= manager.memory_budget_bytes
+
+        manager.get('b')          # reloaded, evicting 'a'
+        stats = manager.stats().set_index('model')
+        assert stats.loc['b', 'loads'] == 2
+        assert not stats.loc['a', 'resident']
+
+
+def test_concurrent_requests_share_one_load():
+    """Threads asking for a model that is not resident wait for a single load."""
+    with tempfile.TemporaryDirectory() as model_dir:
+        manager = make_manager(model_dir, ['a'])
+        original_load = model_manager.joblib.load
+        calls = []
+
+        def slow_load(path):
+            calls.append(path)
+            time.sleep(0.2)
+            return original_load(path)
+
+        model_manager.joblib.load = slow_load
+        try:
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(manager.get('a'))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            model_manager.joblib.load = original_load
+
+        assert len(calls) == 1
+        assert len(results) == 8 and all(model is results[0] for model in results)
+        stats = manager.stats().set_index('model')
+        assert stats.loc['a', 'loads'] == 1 and stats.loc['a', 'hits'] == 7
+
+
+def test_replaced_file_is_reloaded():
+    """A model file replaced on disk is loaded again on the next request."""
+    with tempfile.TemporaryDirectory() as model_dir:
+        manager = make_manager(model_dir, ['a'])
+        first = manager.get('a')
+        assert manager.get('a') is first
+
+        path = os.path.join(model_dir, 'a.joblib')
+        joblib.dump(make_model('zebra'), path)
+        # Make sure the modification time differs even on coarse clocks
+        mtime_ns = os.stat(path).st_mtime_ns + 1_000_000_000
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+        second = manager.get('a')
+        assert second is not first
+        assert 'zebra' in second.named_steps['tfidf'].vocabulary_
+        assert manager.get('a') is second
+        assert manager.stats().set_index('model').loc['a', 'reloads'] == 1
+
+
+def test_pathological_record_is_bounded():
+    """A huge record without whitespace does not stall the rest of its batch."""
+    with tempfile.TemporaryDirectory() as model_dir:
+        manager = make_manager(model_dir, ['a'])
+        messages = ["win a free prize now", 'a.' * 30_000, "see you at lunch"]
+        start = time.perf_counter()
+        labels, spam_probabilities = manager.score('a', messages)
+        assert time.perf_counter() - start < 2.0
+        assert len(labels) == 3 and len(spam_probabilities) == 3
+
+        expected = manager.get('a').predict_proba([messages[0], messages[2]])
+        assert list(labels[[0, 2]]) == ['spam', 'ham']
+        assert abs(spam_probabilities[0] - expected[0, 1]) < 1e-12
+
+
+def test_unknown_and_invalid_keys():
+    """Unknown or malformed keys raise KeyError and leave no stats behind."""
+    with tempfile.TemporaryDirectory() as model_dir:
+        manager = make_manager(model_dir, ['a'])
+        for key in ['missing', '../a', '', None]:
+            try:
+                manager.get(key)
+            except KeyError:
+                pass
+            else:
+                raise AssertionError(f"expected KeyError for {key!r}")
+        assert len(manager.stats()) == 0
+        assert manager.available_models() == ['a']
+
+
+def main():
+    """
+    Run the tests and print a summary.
+    """
+    tests = [
+        test_lru_eviction,
+        test_concurrent_requests_share_one_load,
+        test_replaced_file_is_reloaded,
+        test_pathological_record_is_bounded,
+        test_unknown_and_invalid_keys,
+    ]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"✗ {test.__name__}: {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Tests for the text normalization step
+
+Checks the canonical tokens produced by normalize.py and that a message is
+normalized identically whether it arrives alone (serving) or inside a large
+batch (training), including non-ASCII text.
+
+Usage:
+    python test_normalize.py
+    python -m pytest test_normalize.py
+"""
+
+import sys
+
+from normalize import TextNormalizer, normalize_text, normalize_texts
+
+
+# Message -> expected normalized text
+EXPECTED = {
+    "WINNER!! Call 09061701461 now": "winner!! call  phonetoken  now",
+    "Text FA to 87121": "text fa to  shortcodetoken ",
+    "Win £1000 cash": "win  moneytoken  cash",
+    "Visit www.example.com/x or mail a@b.com": "visit  urltoken  or mail  emailtoken ",
+    "I have 2 cats": "i have  numtoken  cats",
+    "Soooo goood": "soo good",
+    # Non-ASCII characters are never word characters for the rules
+    "é12345": "é shortcodetoken ",
+    "İstanbul": "İstanbul".lower(),
+    "ΣΑΣ": "ΣΑΣ".lower(),
+    "Café 10€ ok": "café  moneytoken  ok",
+    "Only 5$ or 3,50€!": "only  moneytoken  or  moneytoken !",
+    # The batch separator inside a message is treated as a space
+    "a\x00b 12": "a b  numtoken ",
+}
+
+# Batch size well above any size-dependent threshold
+LARGE_BATCH = 500
+
+
+def test_expected_tokens():
+    """Known messages map to the expected canonical text."""
+    for message, expected in EXPECTED.items():
+        assert normalize_text(message) == expected, (message, normalize_text(message))
+
+
+def test_batch_matches_single_message():
+    """Training (large batches) and serving (single messages) normalize identically."""
+    messages = list(EXPECTED) * (LARGE_BATCH // len(EXPECTED) + 1)
+    batch = normalize_texts(messages)
+    single = [normalize_texts([message])[0] for message in messages]
+    assert batch == single
+
+
+def test_transformer_handles_missing_values():
+    """The pipeline step maps missing values to empty text at any batch size."""
+    normalizer = TextNormalizer().fit(None)
+    assert normalizer.transform([None, float('nan'), "Hi"]) == ['', '', 'hi']
+    assert normalizer.transform([None] * LARGE_BATCH) == [''] * LARGE_BATCH
+    assert normalizer.transform([]) == []
+
+
+def main():
+    """
+    Run the tests and print a summary.
+    """
+    tests = [test_expected_tokens, test_batch_matches_single_message, test_transformer_handles_missing_values]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"✗ {test.__name__}: {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
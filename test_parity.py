@@ -0,0 +1,327 @@
+"""
+Parity test suite for SMS Spam Classifier scoring paths
+
+Scores the full bundled dataset with the reference pipeline stored in
+'spam_model.joblib' and keeps the result as a golden file. Every alternative
+scorer registered in SCORERS must reproduce the golden labels exactly and the
+golden spam probabilities within PROBABILITY_TOLERANCE. Throughput of every
+scorer is measured on each run, printed, and appended to
+'parity_throughput.csv' so speedups are always reported next to a parity check.
+
+Usage:
+    python test_parity.py                # check all scorers against golden
+    python test_parity.py --regenerate   # rebuild golden file from reference
+    python -m pytest test_parity.py      # same checks under pytest
+"""
+
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scoring import score_messages, spam_class_index
+
+
+MODEL_PATH = 'spam_model.joblib'
+DATASET_PATH = 'sms_spam_no_header.csv'
+GOLDEN_PATH = 'golden_predictions.csv'
+THROUGHPUT_LOG_PATH = 'parity_throughput.csv'
+
+# Maximum absolute difference allowed between a scorer's spam probability
+# and the golden value. Labels must match exactly.
+PROBABILITY_TOLERANCE = 1e-9
+
+_cache = {}
+
+
+def load_reference():
+    """
+    Load the reference model and the bundled dataset (cached per process).
+
+    Returns:
+        tuple: (model, messages) where messages is a list of SMS strings
+    """
+    if 'reference' not in _cache:
+        model = joblib.load(MODEL_PATH)
+        df = pd.read_csv(DATASET_PATH, header=None, names=['label', 'text'])
+        _cache['reference'] = (model, df['text'].tolist())
+    return _cache['reference']
+
+
+# ---------------------------------------------------------------------------
+# Scorers: each takes (model, messages) and returns (labels, spam_proba 0-1)
+# ---------------------------------------------------------------------------
+
+def reference_scorer(model, messages):
+    """Original scoring path: separate predict and predict_proba calls."""
+    labels = model.predict(messages)
+    spam_probabilities = model.predict_proba(messages)[:, spam_class_index(model)]
+    return labels, spam_probabilities
+
+
+def batch_scorer(model, messages):
+    """Single vectorized call over the whole dataset."""
+    return score_messages(model, messages)
+
+
+def chunked_batch_scorer(model, messages, chunk_size=64):
+    """Vectorized calls over small micro-batches."""
+    labels = []
+    spam_probabilities = []
+    for start in range(0, len(messages), chunk_size):
+        chunk_labels, chunk_probabilities = score_messages(
+            model, messages[start:start + chunk_size]
+        )
+        labels.append(chunk_labels)
+        spam_probabilities.append(chunk_probabilities)
+    return np.concatenate(labels), np.concatenate(spam_probabilities)
+
+
+def monitored_batch_scorer(model, messages):
+    """Single vectorized call with the drift monitor attached."""
+    from drift_monitor import DriftMonitor
+
+    return score_messages(model, messages, monitor=DriftMonitor(model))
+
+
+def guarded_scorer(model, messages):
+    """Bounded-cost per-message path (windows, run cap, time budget)."""
+    from latency_guard import score_guarded
+
+    reports = [score_guarded(model, message) for message in messages]
+    return (
+        np.array([report['label'] for report in reports]),
+        np.array([report['spam_probability'] for report in reports]),
+    )
+
+
+def guarded_batch_scorer(model, messages):
+    """Bounded-cost batch path used by streaming and the model manager."""
+    from drift_monitor import DriftMonitor
+    from latency_guard import score_guarded_batch
+
+    return score_guarded_batch(model, messages, monitor=DriftMonitor(model))
+
+
+def app_predict_message_scorer(model, messages):
+    """Per-message path used by the Streamlit app."""
+    from app import predict_message
+
+    labels = []
+    spam_probabilities = []
+    for message in messages:
+        prediction, confidence_spam, _, _ = predict_message(model, message)
+        labels.append(prediction)
+        spam_probabilities.append(confidence_spam / 100)
+    return np.array(labels), np.array(spam_probabilities)
+
+
+SCORERS = {
+    'batch': batch_scorer,
+    'chunked_batch': chunked_batch_scorer,
+    'monitored_batch': monitored_batch_scorer,
+    'guarded': guarded_scorer,
+    'guarded_batch': guarded_batch_scorer,
+    'app_predict_message': app_predict_message_scorer,
+}
+
+
+# ---------------------------------------------------------------------------
+# Golden file and throughput helpers
+# ---------------------------------------------------------------------------
+
+def generate_golden(path=GOLDEN_PATH):
+    """
+    Score the full dataset with the reference scorer and save the result.
+
+    Args:
+        path (str): Where to write the golden CSV
+
+    Returns:
+        pandas.DataFrame: Golden labels and spam probabilities
+    """
+    model, messages = load_reference()
+    labels, spam_probabilities = reference_scorer(model, messages)
+    golden = pd.DataFrame({
+        'label': labels,
+        'spam_probability': spam_probabilities,
+    })
+    # 17 significant digits round-trip float64 exactly
+    golden.to_csv(path, index=False, float_format='%.17g')
+    return golden
+
+
+def load_golden(path=GOLDEN_PATH):
+    """
+    Load the golden predictions.
+
+    The golden file is never rebuilt implicitly: a missing file would
+    otherwise be regenerated from the reference scorer and the check would
+    compare the reference with itself.
+
+    Args:
+        path (str): Path to the golden CSV
+
+    Returns:
+        pandas.DataFrame: Golden labels and spam probabilities
+
+    Raises:
+        FileNotFoundError: If the golden file does not exist
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Golden file '{path}' not found. Run 'python test_parity.py --regenerate' "
+            f"to create it from the reference model, then review and commit it."
+        )
+    return pd.read_csv(path)
+
+
+def measure(scorer, model, messages):
+    """
+    Run a scorer once and time it.
+
+    Returns:
+        tuple: (labels, spam_probabilities, elapsed_seconds)
+    """
+    start = time.perf_counter()
+    labels, spam_probabilities = scorer(model, messages)
+    elapsed = time.perf_counter() - start
+    return np.asarray(labels), np.asarray(spam_probabilities, dtype=float), elapsed
+
+
+def record_throughput(name, n_messages, elapsed, path=THROUGHPUT_LOG_PATH):
+    """
+    Append one throughput measurement to the CSV log.
+    """
+    new_file = not os.path.exists(path)
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(['timestamp', 'scorer', 'messages', 'seconds', 'messages_per_second'])
+        writer.writerow([
+            datetime.now().isoformat(timespec='seconds'),
+            name,
+            n_messages,
+            f"{elapsed:.6f}",
+            f"{n_messages / elapsed:.1f}",
+        ])
+
+
+def compare_to_golden(name, labels, spam_probabilities, golden):
+    """
+    Compare scorer output with the golden predictions.
+
+    Raises:
+        AssertionError: If any label differs or any probability is out of tolerance
+    """
+    assert len(labels) == len(golden), (
+        f"{name}: scored {len(labels)} messages, golden has {len(golden)}"
+    )
+
+    label_mismatches = np.flatnonzero(labels != golden['label'].to_numpy())
+    assert len(label_mismatches) == 0, (
+        f"{name}: {len(label_mismatches)} label mismatches, "
+        f"first at rows {label_mismatches[:5].tolist()}"
+    )
+
+    max_diff = np.max(np.abs(spam_probabilities - golden['spam_probability'].to_numpy()))
+    assert max_diff <= PROBABILITY_TOLERANCE, (
+        f"{name}: max probability difference {max_diff:.3e} "
+        f"exceeds tolerance {PROBABILITY_TOLERANCE:.0e}"
+    )
+    return max_diff
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_reference_matches_golden():
+    """The reference pipeline still reproduces the stored golden file."""
+    model, messages = load_reference()
+    golden = load_golden()
+    labels, spam_probabilities, elapsed = measure(reference_scorer, model, messages)
+    record_throughput('reference', len(messages), elapsed)
+    compare_to_golden('reference', labels, spam_probabilities, golden)
+
+
+def test_scorers_match_golden():
+    """Every registered alternative scorer matches the golden predictions."""
+    model, messages = load_reference()
+    golden = load_golden()
+    failures = []
+    for name, scorer in SCORERS.items():
+        labels, spam_probabilities, elapsed = measure(scorer, model, messages)
+        record_throughput(name, len(messages), elapsed)
+        try:
+            compare_to_golden(name, labels, spam_probabilities, golden)
+        except AssertionError as e:
+            failures.append(str(e))
+    assert not failures, "\n".join(failures)
+
+
+def main():
+    """
+    Run the parity checks and print a throughput table.
+    """
+    if '--regenerate' in sys.argv[1:]:
+        golden = generate_golden()
+        print(f"✓ Golden file written to '{GOLDEN_PATH}' ({len(golden)} messages)")
+        return 0
+
+    print("Loading reference model and dataset...")
+    model, messages = load_reference()
+    try:
+        golden = load_golden()
+    except FileNotFoundError as e:
+        print(f"✗ {e}")
+        return 1
+    print(f"✓ {len(messages)} messages, golden file '{GOLDEN_PATH}'\n")
+
+    print("=" * 78)
+    print("PARITY AND THROUGHPUT")
+    print("=" * 78)
+    print(f"{'Scorer':<22}{'Result':<8}{'Max |Δp|':>12}{'Seconds':>10}{'Msg/s':>12}{'Speedup':>10}")
+    print("-" * 78)
+
+    all_scorers = {'reference': reference_scorer}
+    all_scorers.update(SCORERS)
+
+    all_passed = True
+    reference_elapsed = None
+    for name, scorer in all_scorers.items():
+        labels, spam_probabilities, elapsed = measure(scorer, model, messages)
+        record_throughput(name, len(messages), elapsed)
+        if reference_elapsed is None:
+            reference_elapsed = elapsed
+
+        try:
+            max_diff = compare_to_golden(name, labels, spam_probabilities, golden)
+            result = "PASS"
+        except AssertionError as e:
+            max_diff = float('nan')
+            result = "FAIL"
+            all_passed = False
+            print(f"  {e}")
+
+        print(
+            f"{name:<22}{result:<8}{max_diff:>12.2e}{elapsed:>10.3f}"
+            f"{len(messages) / elapsed:>12.0f}{reference_elapsed / elapsed:>9.2f}x"
+        )
+
+    print("=" * 78)
+    print(f"Throughput appended to '{THROUGHPUT_LOG_PATH}'")
+    if all_passed:
+        print("✓ ALL SCORERS MATCH GOLDEN OUTPUT")
+        return 0
+    print("✗ PARITY FAILURES - see messages above")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
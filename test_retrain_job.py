@@ -0,0 +1,217 @@
+"""
+Tests for the background retraining job
+
+Checks the single-job lock and stale-lock handling, cancelling a job right
+after it starts, that an overdue cancel only kills a job that has not
+claimed the swap, and that a newly swapped-in similarity index refuses
+queries from the model it replaces. Jobs run with every path in a temporary
+directory and a copy of the model, so the live files are never touched.
+
+Usage:
+    python test_retrain_job.py
+    python -m pytest test_retrain_job.py
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+import retrain_job
+from retrain_job import JOB_STAGES, JobRunner, _acquire_lock, _claim_outcome, _lock_owner
+from similarity import build_index, load_index
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+JOB_TIMEOUT_SECONDS = 60
+
+
+def make_runner(tmp_dir):
+    """Runner whose model, staging, event, log and lock files live in tmp_dir."""
+    model_path = os.path.join(tmp_dir, 'spam_model.joblib')
+    shutil.copy(os.path.join(HERE, 'spam_model.joblib'), model_path)
+    return JobRunner(
+        dataset_path=os.path.join(HERE, retrain_job.DATASET_PATH),
+        model_path=model_path,
+        staging_dir=os.path.join(tmp_dir, 'staging'),
+        events_path=os.path.join(tmp_dir, 'events.jsonl'),
+        log_path=os.path.join(tmp_dir, 'retrain.log'),
+        lock_path=os.path.join(tmp_dir, 'retrain.lock'),
+    )
+
+
+def wait_until_finished(runner):
+    deadline = time.time() + JOB_TIMEOUT_SECONDS
+    while time.time() < deadline:
+        state = runner.state()
+        if state['status'] in retrain_job.FINAL_STATUSES:
+            return state
+        time.sleep(0.1)
+    raise AssertionError(f"job did not finish within {JOB_TIMEOUT_SECONDS} s")
+
+
+def fake_job(runner):
+    """Start a sleeping process and record it as a running job that was asked to cancel."""
+    process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    with open(runner.lock_path, 'w') as f:
+        f.write(str(process.pid))
+    with open(runner.events_path, 'w') as f:
+        for event in [
+            {'type': 'started', 'time': time.time(), 'pid': process.pid},
+            {'type': 'stage', 'time': time.time(), 'name': JOB_STAGES[0]},
+            {'type': 'cancel_requested', 'time': time.time()},
+        ]:
+            f.write(json.dumps(event) + '\n')
+    return process
+
+
+def test_lock_is_exclusive_and_stale_locks_are_replaced():
+    """A live owner keeps the lock; a dead owner's lock is taken over."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lock_path = os.path.join(tmp_dir, 'retrain.lock')
+        assert _acquire_lock(lock_path)
+        assert _lock_owner(lock_path) == os.getpid()
+        assert not _acquire_lock(lock_path)
+
+        finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+        finished.wait()
+        with open(lock_path, 'w') as f:
+            f.write(str(finished.pid))
+        assert _lock_owner(lock_path) is None
+        assert _acquire_lock(lock_path)
+        assert _lock_owner(lock_path) == os.getpid()
+
+
+def test_outcome_is_claimed_once():
+    """Swap and kill cannot both be decided for the same job."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lock_path = os.path.join(tmp_dir, 'retrain.lock')
+        assert _claim_outcome('swap', lock_path)
+        assert not _claim_outcome('kill', lock_path)
+        assert not _claim_outcome('swap', lock_path)
+
+
+def test_cancel_right_after_start():
+    """A job cancelled while its process is still starting stops without touching the model."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runner = make_runner(tmp_dir)
+        with open(runner.model_path, 'rb') as f:
+            model_bytes = f.read()
+
+        runner.start()
+        assert runner.state()['status'] == 'running'
+        assert runner.is_running()
+        try:
+            runner.start()
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("a second job was started")
+
+        assert runner.cancel()
+        state = wait_until_finished(runner)
+        assert state['status'] == 'cancelled', (state, runner.read_log())
+        assert state['step'] < JOB_STAGES.index(retrain_job.SWAP_STAGE) + 1
+
+        with open(runner.model_path, 'rb') as f:
+            assert f.read() == model_bytes
+        assert not os.path.exists(runner.staging_dir)
+        assert not os.path.exists(runner.lock_path)
+        assert not runner.is_running()
+        assert not runner.cancel()
+
+
+def test_overdue_cancel_spares_a_swapping_job():
+    """The grace-period kill is skipped once the job has claimed the swap."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runner = make_runner(tmp_dir)
+        grace_seconds = retrain_job.CANCEL_GRACE_SECONDS
+        retrain_job.CANCEL_GRACE_SECONDS = 0
+        process = fake_job(runner)
+        try:
+            time.sleep(0.01)
+            assert _claim_outcome('swap', runner.lock_path)
+            assert runner.state()['status'] == 'running'
+            assert process.poll() is None
+
+            # Without the swap claim the overdue job is killed
+            os.remove(runner.lock_path + retrain_job.OUTCOME_SUFFIX)
+            state = runner.state()
+            assert state['status'] == 'cancelled'
+            assert process.wait(timeout=5) < 0
+            assert not os.path.exists(runner.lock_path)
+        finally:
+            retrain_job.CANCEL_GRACE_SECONDS = grace_seconds
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+
+def test_dead_job_is_reported_as_failed():
+    """A job process that exits without reporting is marked failed and its lock released."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runner = make_runner(tmp_dir)
+        process = fake_job(runner)
+        process.kill()
+        process.wait()
+
+        state = runner.state()
+        assert state['status'] == 'failed'
+        assert 'exited unexpectedly' in state['message']
+        assert not os.path.exists(runner.lock_path)
+
+
+def test_swapped_index_refuses_the_old_model():
+    """Mid-swap, a new index next to the old model is not queried with it."""
+    def fit(texts):
+        return Pipeline([('tfidf', TfidfVectorizer()), ('classifier', MultinomialNB())]).fit(
+            texts, ['spam', 'ham'])
+
+    # Same vocabulary size, different terms: only the fingerprint tells them apart
+    old_model = fit(["win cash prize", "see you soon"])
+    new_model = fit(["claim free prize", "meet you later"])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'spam_model_neighbors.joblib')
+        build_index(new_model, ["claim free prize", "meet you later"], ['spam', 'ham'], path)
+        index = load_index(path)
+        assert index.query(new_model, "free prize")[0]['label'] == 'spam'
+        try:
+            index.query(old_model, "free prize")
+        except ValueError as e:
+            assert 'different model vocabulary' in str(e)
+        else:
+            raise AssertionError("the old model queried the new index")
+
+
+def main():
+    """
+    Run the tests and print a summary.
+    """
+    tests = [
+        test_lock_is_exclusive_and_stale_locks_are_replaced,
+        test_outcome_is_claimed_once,
+        test_cancel_right_after_start,
+        test_overdue_cancel_spares_a_swapping_job,
+        test_dead_job_is_reported_as_failed,
+        test_swapped_index_refuses_the_old_model,
+    ]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"✗ {test.__name__}: {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Tests for the similar-message lookup
+
+Checks top_k_rows against a brute-force dense cosine top-k, queries that
+share no term with the corpus, and that an index refuses a model with a
+different vocabulary.
+
+Usage:
+    python test_similarity.py
+    python -m pytest test_similarity.py
+"""
+
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from similarity import SimilarityIndex, vectorize
+
+
+MODEL_PATH = 'spam_model.joblib'
+DATASET_PATH = 'sms_spam_no_header.csv'
+K = 5
+
+
+def load_corpus(size=500):
+    data = pd.read_csv(DATASET_PATH, header=None, names=['label', 'text'])
+    return data['text'].tolist()[:size], data['label'].tolist()[:size]
+
+
+def brute_force_top_k(model, corpus, message, k):
+    """Dense cosine similarity with every corpus message, best k with a positive score."""
+    docs = vectorize(model, corpus).toarray()
+    query = vectorize(model, [message]).toarray()[0]
+    similarities = docs @ query
+    order = np.argsort(-similarities, kind='stable')[:k]
+    return order[similarities[order] > 0], similarities
+
+
+def test_top_k_matches_brute_force():
+    """The sparse term-major lookup finds the same neighbors as a dense scan."""
+    model = joblib.load(MODEL_PATH)
+    corpus, labels = load_corpus()
+    index = SimilarityIndex.build(model, corpus, labels)
+    data = pd.read_csv(DATASET_PATH, header=None, names=['label', 'text'])
+    for message in data['text'].tolist()[500:560]:
+        rows, similarities = index.top_k_rows(vectorize(model, [message]), K)
+        expected_rows, expected = brute_force_top_k(model, corpus, message, K)
+        assert len(rows) == len(expected_rows), message
+        assert np.allclose(similarities, expected[expected_rows], atol=1e-5), message
+        # Ties may be ordered differently; every returned row must score as claimed
+        assert np.allclose(expected[rows], similarities, atol=1e-5), message
+        assert list(similarities) == sorted(similarities, reverse=True)
+
+
+def test_query_with_no_shared_term():
+    """A message with no known term has no neighbors instead of arbitrary ones."""
+    model = joblib.load(MODEL_PATH)
+    corpus, labels = load_corpus(100)
+    index = SimilarityIndex.build(model, corpus, labels)
+    assert index.query(model, "qqqzzx xyzzyq") == []
+    assert index.query(model, "") == []
+
+    neighbors = index.query(model, corpus[0])
+    assert neighbors[0]['text'] == corpus[0]
+    assert abs(neighbors[0]['similarity'] - 1) < 1e-5
+
+
+def test_vocabulary_mismatch_is_rejected():
+    """An index built with another model refuses queries from this one."""
+    model = joblib.load(MODEL_PATH)
+    corpus, labels = load_corpus(100)
+    other = Pipeline([('tfidf', TfidfVectorizer()), ('classifier', MultinomialNB())]).fit(corpus, labels)
+    index = SimilarityIndex.build(other, corpus, labels)
+
+    for fingerprint in (index.fingerprint, None):
+        index.fingerprint = fingerprint
+        try:
+            index.query(model, "free prize")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"mismatched model was accepted (fingerprint {fingerprint})")
+    assert index.query(other, corpus[0])[0]['text'] == corpus[0]
+
+
+def main():
+    """
+    Run the tests and print a summary.
+    """
+    tests = [
+        test_top_k_matches_brute_force,
+        test_query_with_no_shared_term,
+        test_vocabulary_mismatch_is_rejected,
+    ]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"✗ {test.__name__}: {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Tests for the streaming classifier
+
+Checks micro-batch flushing by size and by delay, verdict and error lines,
+and that the reader always ends the stream: at end of input, after the
+followed file is rotated or deleted, and when reading fails.
+
+Usage:
+    python test_stream_classify.py
+    python -m pytest test_stream_classify.py
+"""
+
+import io
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+import joblib
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from model_manager import ModelManager
+from stream_classify import _EOF, collect_batch, follow_file, read_stdin, run_stream
+
+
+TIMEOUT_SECONDS = 5
+
+
+def make_manager(model_dir):
+    """Manager whose default model is a tiny pipeline saved in model_dir."""
+    texts = ["win a free prize now", "claim your cash prize", "see you at lunch", "thanks for your help"]
+    labels = ['spam', 'spam', 'ham', 'ham']
+    model = Pipeline([('tfidf', TfidfVectorizer()), ('classifier', MultinomialNB())]).fit(texts, labels)
+    path = os.path.join(model_dir, 'spam_model.joblib')
+    joblib.dump(model, path)
+    return ModelManager(model_dir, default_path=path, monitor_drift=False)
+
+
+def queued(*lines):
+    q = queue.Queue()
+    for line in lines:
+        q.put((time.perf_counter(), line))
+    return q
+
+
+def drain(lines, count):
+    """Take count items from the queue, failing if they do not arrive in time."""
+    items = []
+    for _ in range(count):
+        try:
+            items.append(lines.get(timeout=TIMEOUT_SECONDS))
+        except queue.Empty:
+            raise AssertionError(f"expected {count} items, got {len(items)}: {items}")
+    return [item if item is _EOF else item[1] for item in items]
+
+
+def test_batch_flushes_at_size():
+    """A full batch is returned at once, leaving the rest queued."""
+    lines = queued(*[f'{i}\n' for i in range(10)])
+    start = time.perf_counter()
+    batch, eof = collect_batch(lines, batch_size=4, max_delay=60)
+    assert len(batch) == 4 and not eof
+    assert time.perf_counter() - start < 1
+    assert lines.qsize() == 6
+
+
+def test_batch_flushes_at_max_delay():
+    """A partial batch is returned once its oldest line has waited max_delay."""
+    lines = queued('a\n', 'b\n')
+    start = time.perf_counter()
+    batch, eof = collect_batch(lines, batch_size=100, max_delay=0.05)
+    elapsed = time.perf_counter() - start
+    assert [line for _, line in batch] == ['a\n', 'b\n'] and not eof
+    assert 0.04 <= elapsed < 1, elapsed
+
+
+def test_batch_idle_and_eof():
+    """An idle queue yields an empty batch; the end marker ends the stream."""
+    assert collect_batch(queue.Queue(), 10, 0.01, idle_timeout=0.01) == ([], False)
+
+    lines = queued('a\n')
+    lines.put(_EOF)
+    batch, eof = collect_batch(lines, 10, 60)
+    assert len(batch) == 1 and eof
+
+    lines = queue.Queue()
+    lines.put(_EOF)
+    assert collect_batch(lines, 10, 0.01) == ([], True)
+
+
+def test_verdicts_and_error_lines():
+    """Valid lines get predictions; bad lines get an error and are counted."""
+    with tempfile.TemporaryDirectory() as model_dir:
+        manager = make_manager(model_dir)
+        lines = queue.Queue()
+        read_stdin(lines, threading.Event(), io.StringIO(
+            '{"id": 1, "message": "win a free prize now"}\n'
+            'not json\n'
+            '{"id": 3, "text": "wrong field"}\n'
+            '[1, 2]\n'
+            '{"id": 5, "message": "see you at lunch"}\n'
+        ))
+        out = io.StringIO()
+        summary = run_stream(manager, lines, out, batch_size=2, max_delay=0.01, report_interval=0)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert len(records) == 5
+        assert records[0]['prediction'] == 'spam' and records[4]['prediction'] == 'ham'
+        assert records[1]['error'].startswith('invalid JSON')
+        assert records[2]['error'] == "missing string field 'message'"
+        assert records[3]['error'] == "expected a JSON object"
+        assert all('latency_ms' in record for record in records)
+        assert summary['messages'] == 5 and summary['errors'] == 3 and summary['batches'] == 3
+
+
+def test_follow_survives_rotation_and_deletion():
+    """A rotated or deleted file is picked up again when the path reappears."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'feed.jsonl')
+        with open(path, 'w') as f:
+            f.write('old\n')
+        lines = queue.Queue()
+        stop = threading.Event()
+        reader = threading.Thread(target=follow_file, args=(path, lines, stop),
+                                  kwargs={'poll_interval': 0.01}, daemon=True)
+        reader.start()
+        time.sleep(0.1)
+
+        with open(path, 'a') as f:
+            f.write('one\ntw')
+        time.sleep(0.05)
+        with open(path, 'a') as f:
+            f.write('o\n')
+        assert drain(lines, 2) == ['one\n', 'two\n']
+
+        # Rename and recreate: the new file is read from the top
+        os.rename(path, path + '.1')
+        with open(path, 'w') as f:
+            f.write('three\n')
+        assert drain(lines, 1) == ['three\n']
+
+        # Deleted, then created again later
+        os.remove(path)
+        time.sleep(0.1)
+        assert reader.is_alive() and lines.empty()
+        with open(path, 'w') as f:
+            f.write('four\n')
+        assert drain(lines, 1) == ['four\n']
+
+        # Truncated in place and rewritten with less content
+        with open(path, 'w') as f:
+            f.write('5\n')
+        assert drain(lines, 1) == ['5\n']
+
+        stop.set()
+        assert drain(lines, 1) == [_EOF]
+        reader.join(TIMEOUT_SECONDS)
+        assert not reader.is_alive()
+
+
+def test_reader_failure_still_ends_stream():
+    """When reading fails, the end marker is queued so the scorer stops."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'feed.jsonl')
+        with open(path, 'wb') as f:
+            f.write(b'\xff\xfe not utf-8\n')
+        lines = queue.Queue()
+        try:
+            follow_file(path, lines, threading.Event(), from_start=True, poll_interval=0.01)
+        except UnicodeDecodeError:
+            pass
+        else:
+            raise AssertionError("expected the read to fail")
+        assert drain(lines, 1) == [_EOF]
+
+        broken = io.StringIO('{"message": "hi"}\n')
+        broken.close()
+        lines = queue.Queue()
+        try:
+            read_stdin(lines, threading.Event(), broken)
+        except ValueError:
+            pass
+        assert drain(lines, 1) == [_EOF]
+
+
+def main():
+    """
+    Run the tests and print a summary.
+    """
+    tests = [
+        test_batch_flushes_at_size,
+        test_batch_flushes_at_max_delay,
+        test_batch_idle_and_eof,
+        test_verdicts_and_error_lines,
+        test_follow_survives_rotation_and_deletion,
+        test_reader_failure_still_ends_stream,
+    ]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"✗ {test.__name__}: {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
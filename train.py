@@ -10,6 +10,9 @@ Usage:
 Output:
     - Prints training progress and evaluation metrics
     - Saves trained model to 'spam_model.joblib'
+    - Saves drift reference profile to 'spam_model_drift.json'
+    - Saves similar-message index to 'spam_model_neighbors.joblib'
+    - Saves per-message predictions to 'predictions.db'
 """
 
 import pandas as pd
@@ -22,6 +25,11 @@ from sklearn.metrics import accuracy_score, confusion_matrix, classification_rep
 import os
 import sys
 
+from drift_monitor import build_reference, reference_path_for
+from explorer import PREDICTIONS_PATH, build_predictions_db
+from normalize import TextNormalizer
+from similarity import build_index, index_path_for
+
 
 def load_dataset(file_path='sms_spam_no_header.csv'):
     """
@@ -41,7 +49,7 @@ def load_dataset(file_path='sms_spam_no_header.csv'):
     print("=" * 60)
     print()
     
-    print(f"[1/6] Loading dataset from '{file_path}'...")
+    print(f"[1/9] Loading dataset from '{file_path}'...")
     
     if not os.path.exists(file_path):
         error_msg = f"Dataset file '{file_path}' not found. Please ensure the file exists in the current directory."
@@ -84,7 +92,7 @@ def split_data(df, test_size=0.2, random_state=42):
     Returns:
         tuple: X_train, X_test, y_train, y_test
     """
-    print(f"[2/6] Splitting data into train/test sets (80/20 split)...")
+    print(f"[2/9] Splitting data into train/test sets (80/20 split)...")
     
     X = df['text']
     y = df['label']
@@ -106,7 +114,7 @@ def split_data(df, test_size=0.2, random_state=42):
 
 def create_and_train_model(X_train, y_train):
     """
-    Create a TF-IDF + Multinomial Naive Bayes pipeline and train it.
+    Create a normalization + TF-IDF + Multinomial Naive Bayes pipeline and train it.
     
     Args:
         X_train: Training text data
@@ -115,14 +123,18 @@ def create_and_train_model(X_train, y_train):
     Returns:
         sklearn.pipeline.Pipeline: Trained model pipeline
     """
-    print("[3/6] Creating and training model...")
+    print("[3/9] Creating and training model...")
+    print("  - Normalizer: canonical tokens for numbers, prices, URLs and short codes")
     print("  - Vectorizer: TF-IDF (Term Frequency-Inverse Document Frequency)")
     print("  - Classifier: Multinomial Naive Bayes")
     print()
     
-    # Create pipeline: TF-IDF vectorization + Multinomial Naive Bayes
+    # Create pipeline: text normalization + TF-IDF vectorization + Multinomial Naive Bayes
+    # The normalizer is part of the saved pipeline, so app.py applies it too.
+    # It already lower-cases, so the vectorizer does not need to.
     model = Pipeline([
-        ('tfidf', TfidfVectorizer()),
+        ('normalize', TextNormalizer()),
+        ('tfidf', TfidfVectorizer(lowercase=False)),
         ('classifier', MultinomialNB())
     ])
     
@@ -136,7 +148,7 @@ def create_and_train_model(X_train, y_train):
     return model
 
 
-def evaluate_model(model, X_test, y_test):
+def evaluate_model(model, X_test, y_test, progress=None):
     """
     Evaluate model performance on test set.
     
@@ -144,21 +156,37 @@ def evaluate_model(model, X_test, y_test):
         model: Trained model pipeline
         X_test: Testing text data
         y_test: Testing labels
+        progress (callable): Optional callback; each metric is passed to
+            ``progress('metric', name=..., value=...)`` as soon as it is computed
         
     Returns:
         dict: Evaluation metrics
     """
-    print("[4/6] Evaluating model performance...")
+    print("[4/9] Evaluating model performance...")
     print()
     
+    def emit(name, value):
+        if progress is not None:
+            progress('metric', name=name, value=value)
+    
     # Make predictions
     y_pred = model.predict(X_test)
     
     # Calculate accuracy
     accuracy = accuracy_score(y_test, y_pred)
+    emit('accuracy', float(accuracy))
     
     # Generate confusion matrix
     cm = confusion_matrix(y_test, y_pred, labels=['ham', 'spam'])
+    emit('confusion_matrix', cm.tolist())
+    
+    # Per-class precision, recall and F1
+    per_class = classification_report(y_test, y_pred, labels=['ham', 'spam'], output_dict=True)
+    for label in ['ham', 'spam']:
+        emit(f'{label}_metrics', {
+            metric: float(per_class[label][metric])
+            for metric in ['precision', 'recall', 'f1-score', 'support']
+        })
     
     # Generate classification report
     report = classification_report(y_test, y_pred, target_names=['ham', 'spam'])
@@ -196,7 +224,7 @@ def save_model(model, file_path='spam_model.joblib'):
         model: Trained model pipeline
         file_path (str): Path where model will be saved
     """
-    print(f"[5/6] Saving trained model to '{file_path}'...")
+    print(f"[5/9] Saving trained model to '{file_path}'...")
     
     # Save model using joblib
     joblib.dump(model, file_path)
@@ -214,28 +242,156 @@ def save_model(model, file_path='spam_model.joblib'):
     print()
 
 
+def save_drift_reference(model, X_test, model_path='spam_model.joblib'):
+    """
+    Write the reference profile used by the live drift monitor.
+    
+    The profile summarizes held-out messages: the training rows themselves
+    are in-vocabulary by construction and scored overconfidently, so they
+    would make any real traffic look drifted.
+    
+    Args:
+        model: Trained model pipeline
+        X_test: Held-out text data
+        model_path (str): Path of the saved model; the profile is written next to it
+    """
+    file_path = reference_path_for(model_path)
+    print(f"[6/9] Building drift reference profile '{file_path}'...")
+    
+    reference = build_reference(model, X_test, file_path)
+    
+    print(f"✓ Reference profile saved")
+    print(f"  - Messages summarized: {reference.count}")
+    print(f"  - Predicted spam ratio: {reference.spam_ratio:.3f}")
+    print()
+
+
+def save_similarity_index(model, X_train, y_train, model_path='spam_model.joblib'):
+    """
+    Precompute the L2-normalized TF-IDF matrix of the training corpus.
+    
+    The web app uses it to show the labeled training messages closest to
+    each classified message.
+    
+    Args:
+        model: Trained model pipeline
+        X_train: Training text data
+        y_train: Training labels
+        model_path (str): Path of the saved model; the index is written next to it
+    """
+    file_path = index_path_for(model_path)
+    print(f"[7/9] Building similar-message index '{file_path}'...")
+    
+    index = build_index(model, X_train, y_train, file_path)
+    
+    print(f"✓ Similarity index saved")
+    print(f"  - Messages indexed: {len(index)}")
+    print(f"  - Non-zero weights: {index.term_matrix.nnz}")
+    print(f"  - Size: {os.path.getsize(file_path) / 1024:.2f} KB")
+    print()
+
+
+def export_predictions(model, df, test_index, file_path=PREDICTIONS_PATH):
+    """
+    Score the full dataset once and persist per-message predictions.
+    
+    The result is the indexed store browsed by the misclassification
+    explorer page of the web app.
+    
+    Args:
+        model: Trained model pipeline
+        df (pandas.DataFrame): Full dataset with 'label' and 'text' columns
+        test_index: Index of the rows held out for testing
+        file_path (str): Path of the SQLite prediction store
+    """
+    print(f"[8/9] Scoring full dataset for error analysis...")
+    
+    counts = build_predictions_db(model, df, file_path, test_index=test_index)
+    
+    print(f"✓ Predictions saved to '{file_path}'")
+    print(f"  - False positives: {counts.get('false_positive', 0)}")
+    print(f"  - False negatives: {counts.get('false_negative', 0)}")
+    print()
+
+
+# Pipeline steps in order; progress callbacks receive the 1-based step number
+PIPELINE_STAGES = [
+    'Loading dataset',
+    'Splitting data',
+    'Training model',
+    'Evaluating model',
+    'Saving model',
+    'Building drift reference',
+    'Building similarity index',
+    'Scoring full dataset',
+]
+
+
+def run_pipeline(dataset_path='sms_spam_no_header.csv', model_path='spam_model.joblib',
+                 predictions_path=PREDICTIONS_PATH, progress=None):
+    """
+    Run every training step and write the model and its companion files.
+    
+    Args:
+        dataset_path (str): Path to the CSV dataset
+        model_path (str): Where to save the model; the drift reference and
+            similarity index are written next to it
+        predictions_path (str): Where to write the per-message prediction store
+        progress (callable): Optional callback, called as
+            ``progress('stage', step=i, name=...)`` before each step and with
+            metric events from evaluate_model
+        
+    Returns:
+        dict: 'model', 'metrics', 'X_test' and 'y_test'
+    """
+    def stage(step):
+        if progress is not None:
+            progress('stage', step=step, name=PIPELINE_STAGES[step - 1])
+    
+    # Step 1: Load dataset
+    stage(1)
+    df = load_dataset(dataset_path)
+    
+    # Step 2: Split data
+    stage(2)
+    X_train, X_test, y_train, y_test = split_data(df)
+    
+    # Step 3: Create and train model
+    stage(3)
+    model = create_and_train_model(X_train, y_train)
+    
+    # Step 4: Evaluate model
+    stage(4)
+    metrics = evaluate_model(model, X_test, y_test, progress=progress)
+    
+    # Step 5: Save model
+    stage(5)
+    save_model(model, model_path)
+    
+    # Step 6: Reference profile for drift monitoring
+    stage(6)
+    save_drift_reference(model, X_test, model_path)
+    
+    # Step 7: Index training messages for similar-message lookup
+    stage(7)
+    save_similarity_index(model, X_train, y_train, model_path)
+    
+    # Step 8: Persist per-message predictions for error analysis
+    stage(8)
+    export_predictions(model, df, X_test.index, predictions_path)
+    
+    return {'model': model, 'metrics': metrics, 'X_test': X_test, 'y_test': y_test}
+
+
 def main():
     """
     Main training pipeline execution.
     """
     try:
-        # Step 1: Load dataset
-        df = load_dataset('sms_spam_no_header.csv')
-        
-        # Step 2: Split data
-        X_train, X_test, y_train, y_test = split_data(df)
-        
-        # Step 3: Create and train model
-        model = create_and_train_model(X_train, y_train)
-        
-        # Step 4: Evaluate model
-        metrics = evaluate_model(model, X_test, y_test)
-        
-        # Step 5: Save model
-        save_model(model, 'spam_model.joblib')
+        metrics = run_pipeline()['metrics']
         
         # Final summary
-        print("[6/6] Training pipeline complete!")
+        print("[9/9] Training pipeline complete!")
         print()
         print("=" * 60)
         print("SUMMARY")